@@ -0,0 +1,64 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+# Rankings of one student (title -> ranking). Only the ranked classes (and lunches) are stored,
+# every other class is 0.
+class Rankings(dict):
+
+    def __missing__(self, title):
+        return 0
+
+
+'''
+Columns of the classes as arrays indexed by class index (position of the title in classTitles)
+    index     - title -> class index
+    titles    - class index -> title (numpy array, so a list of indices picks their titles)
+    seats, credit, isWI, isFYC
+    dept      - class index -> department id (position in deptNames)
+    division  - class index -> division id (position in divisionNames), -1 if the department has no division
+'''
+class ClassArrays:
+
+    def __init__(self, classTitles: list, classDict: dict, divisions: dict):
+        self.titles = np.array(classTitles, dtype = object)
+        self.index = {title: k for k, title in enumerate(classTitles)}
+        self.seats = np.array([classDict[j][4] for j in classTitles], dtype = np.int32)
+        self.credit = np.array([classDict[j][7] for j in classTitles], dtype = np.float64)
+        self.isWI = np.array([classDict[j][8] for j in classTitles], dtype = bool)
+        self.isFYC = np.array([classDict[j][10] for j in classTitles], dtype = bool)
+
+        self.deptNames = sorted(set(classDict[j][0] for j in classTitles))
+        deptId = {dept: d for d, dept in enumerate(self.deptNames)}
+        self.dept = np.array([deptId[classDict[j][0]] for j in classTitles], dtype = np.int32)
+
+        self.divisionNames = list(divisions)
+        divisionOf = {dept: d for d, division in enumerate(divisions) for dept in divisions[division]}
+        self.division = np.array([divisionOf.get(classDict[j][0], -1) for j in classTitles], dtype = np.int32)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    # Class indices of the titles, in class index order
+    def indices(self, titles) -> np.ndarray:
+        return np.sort(np.fromiter((self.index[j] for j in titles), dtype = np.int64))
+
+
+# Sparse students x classes matrix of the rankings (row of a student = position in ids)
+# Titles that are not classes (ex. special placement names) are left out
+def priority_matrix(ids: list, priorities: dict, classArrays: ClassArrays) -> csr_matrix:
+    rowIndex, colIndex, values = [], [], []
+    for row, i in enumerate(ids):
+        for j, rank in priorities[i].items():
+            if rank != 0 and j in classArrays.index:
+                rowIndex.append(row)
+                colIndex.append(classArrays.index[j])
+                values.append(rank)
+    return csr_matrix((values, (rowIndex, colIndex)), shape = (len(ids), len(classArrays)), dtype = np.float64)
+
+
+# Class indices of the classes the student of the row ranked (ranking > 0), in class index order
+def ranked(matrix: csr_matrix, row: int) -> np.ndarray:
+    start, end = matrix.indptr[row], matrix.indptr[row + 1]
+    indices = matrix.indices[start:end][matrix.data[start:end] > 0]
+    return np.sort(indices)
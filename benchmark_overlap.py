@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import main
+from report import RunReport
+
+# Compares the overlapping times formulations of main.py ("bigM", "clique" and "lazy"; the overlap rows of
+# "lazy" are the ones its callback had to add)
+# Usage: python benchmark_overlap.py [classes.csv] [priorities.csv]
+# Each formulation runs the pipeline up to the solve in a temporary directory, so output files of the
+# regular run are not overwritten.
+
+FORMULATIONS = ["bigM", "clique", "lazy"]
+
+
+# Runs the pipeline with the given settings (constants of main.py, ex. {"OVERLAP_FORMULATION": "clique"})
+# and returns its statistics
+def run(settings: dict, classes: str, priorities: str) -> dict:
+    saved = {name: getattr(main, name) for name in settings}
+    report = RunReport()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        for name in settings:
+            setattr(main, name, settings[name])
+        try:
+            stages = main.run("solve", classes, priorities, report = report)
+        finally:
+            for name in saved:
+                setattr(main, name, saved[name])
+            os.chdir(cwd)
+
+    m = stages["build"].m
+    return {"build time": stages["build"].build_time,
+            "overlap rows": report.families.get("overlap", {"rows": 0})["rows"],
+            "rows": m.NumConstrs,
+            "nonzeros": m.NumNZs,
+            "solve time": m.Runtime,
+            "objective": m.ObjVal + stages["build"].decidedValue}
+
+
+if __name__ == "__main__":
+    classes = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else "classes.csv")
+    priorities = os.path.abspath(sys.argv[2] if len(sys.argv) > 2 else "priorities.csv")
+
+    results = [run({"OVERLAP_FORMULATION": formulation}, classes, priorities) for formulation in FORMULATIONS]
+
+    print()
+    print("{:<12}{:>14}{:>14}{:>10}{:>12}{:>14}{:>14}".format("formulation", "build time(s)", "overlap rows",
+                                                               "rows", "nonzeros", "solve time(s)", "objective"))
+    for formulation, r in zip(FORMULATIONS, results):
+        print("{:<12}{:>14.2f}{:>14}{:>10}{:>12}{:>14.2f}{:>14.2f}".format(formulation, r["build time"], r["overlap rows"],
+                                                                          r["rows"], r["nonzeros"], r["solve time"], r["objective"]))
@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import subprocess
+import traceback
+from generate_instance import generate
+from report import RunReport, peak_memory
+
+# Measures how main.py scales with the number of students on synthetic instances (generate_instance.py)
+# Usage: python benchmark_scaling.py [students ...]   (default 100 500 1000 3000)
+# Every size runs in its own process and temporary directory; settings of main.py are taken from the
+# environment (ex. MODEL_ENGINE=types python benchmark_scaling.py). Results go to RESULTS_FILE, and the
+# times of the previous results file are printed next to the new ones for regression comparison.
+
+SIZES = [100, 500, 1000, 3000]
+SEED = 0
+RESULTS_FILE = "benchmark_results.json"
+SETTINGS = ["MODEL_ENGINE", "OVERLAP_FORMULATION", "HEURISTIC", "PROCESSES", "PRESOLVE", "TWO_STAGE", "DECOMPOSE"]
+
+
+# Runs the pipeline of main.py in the current directory and writes its statistics to benchmark.json
+# (statistics of the stages and phases that finished are kept if a stage fails, ex. Gurobi license limits)
+def run_main():
+    import main
+    report = RunReport()
+    stages = {}
+    stats = {"error": None}
+    start = time.time()
+    try:
+        main.run("export", stages = stages, report = report)
+    except Exception as e:
+        stats["error"] = "".join(traceback.format_exception_only(type(e), e)).strip()
+    stats["total time"] = time.time() - start
+
+    report.phase() # the phase that failed
+    stats["parse time"] = report.time("read classes") + report.time("read students")
+    stats["build time"] = report.time("preprocess students") + report.time("constraints") + report.time("presolve") + report.time("model")
+    stats["phases"] = report.as_dict()["phases"]
+    stats["families"] = report.families
+    if "catalog" in stages:
+        stats["classes"] = len(stages["catalog"].classTitles)
+    if "students" in stages:
+        stats["students"] = len(stages["students"].id)
+    if "build" in stages:
+        m = stages["build"].m
+        stats["variables"] = m.NumVars
+        stats["rows"] = m.NumConstrs
+        stats["nonzeros"] = m.NumNZs
+        outside = stages["build"].decidedValue + stages["build"].fixedValue # students outside the model
+        if "decomposition" in report.values:
+            # the components are solved as models of their own, the full model is not built
+            stats["solve time"] = report.values["decomposition"]["time"]
+            stats["objective"] = report.values["decomposition"]["objective"] + outside
+        elif m.SolCount > 0:
+            stats["solve time"] = m.Runtime
+            stats["objective"] = m.ObjVal + outside
+    stats["peak memory (MB)"] = peak_memory()
+    with open("benchmark.json", "w") as f:
+        json.dump(stats, f, indent = 1)
+
+
+# Generates an instance of the given size and runs main.py on it in a separate process
+def benchmark(students: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        generate_start = time.time()
+        sections = generate(students, SEED, directory)
+        result = {"size": students, "sections": sections, "generate time": time.time() - generate_start}
+        with open(os.path.join(directory, "main.log"), "w") as log:
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--run"], cwd = directory, stdout = log, stderr = subprocess.STDOUT)
+        try:
+            with open(os.path.join(directory, "benchmark.json")) as f:
+                result.update(json.load(f))
+        except FileNotFoundError:
+            result["error"] = "main.py did not report (see main.log)"
+    return result
+
+
+def fmt(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--run"]:
+        run_main()
+        sys.exit(0)
+
+    import main # settings in effect (main.py reads them from the environment, as the runs do)
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    previous = {}
+    if os.path.exists(RESULTS_FILE):
+        with open(RESULTS_FILE) as f:
+            previous = {r["size"]: r for r in json.load(f)["results"]}
+
+    results = []
+    for students in sizes:
+        print("Benchmarking {} students...".format(students))
+        results.append(benchmark(students))
+        if results[-1]["error"] is not None:
+            print("[!] " + results[-1]["error"])
+
+    with open(RESULTS_FILE, "w") as f:
+        json.dump({"date": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(), "seed": SEED,
+                   "settings": {name: getattr(main, name) for name in SETTINGS}, "results": results}, f, indent = 1)
+
+    print()
+    print("{:>9}{:>10}{:>12}{:>12}{:>12}{:>12}{:>12}{:>12}{:>12}{:>12}".format("students", "sections", "parse(s)", "build(s)",
+          "solve(s)", "total(s)", "prev(s)", "rows", "nonzeros", "memory(MB)"))
+    for r in results:
+        print("{:>9}{:>10}{:>12}{:>12}{:>12}{:>12}{:>12}{:>12}{:>12}{:>12}".format(r["size"], r["sections"],
+              fmt(r.get("parse time"), ".2f"), fmt(r.get("build time"), ".2f"), fmt(r.get("solve time"), ".2f"),
+              fmt(r.get("total time"), ".2f"), fmt(previous.get(r["size"], {}).get("total time"), ".2f"),
+              fmt(r.get("rows"), "d"), fmt(r.get("nonzeros"), "d"), fmt(r.get("peak memory (MB)"), ".1f")))
+    print()
+    print("Results written to " + RESULTS_FILE)
@@ -0,0 +1,63 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import generate_instance
+from benchmark_overlap import run
+
+# Checks that the model engines of main.py build models equivalent to the original model (quicksum engine,
+# big-M overlap rows, no presolve) by comparing their optimal objective with it (for every overlap
+# formulation), and runs the two-stage solve
+# Usage: python compare_engines.py [classes.csv] [priorities.csv]
+# Without files the instance is made by generate_instance.py (STUDENTS students, SEED), small enough for a
+# size-limited Gurobi license
+
+ENGINES = ["quicksum", "matrix", "schedules", "types", "lagrangian"]
+if importlib.util.find_spec("ortools") is not None: # the "cpsat" engine is compared where OR-Tools is installed
+    ENGINES.append("cpsat")
+
+# settings of the reference run: the original model
+REFERENCE = {"MODEL_ENGINE": "quicksum", "OVERLAP_FORMULATION": "bigM", "PRESOLVE": ""}
+
+# generated instance
+STUDENTS = 80
+SEED = 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        classes = os.path.abspath(sys.argv[1])
+        priorities = os.path.abspath(sys.argv[2] if len(sys.argv) > 2 else "priorities.csv")
+    else:
+        instance = tempfile.TemporaryDirectory() # removed on exit
+        generate_instance.generate(STUDENTS, SEED, instance.name)
+        classes = os.path.join(instance.name, "classes.csv")
+        priorities = os.path.join(instance.name, "priorities.csv")
+        print("Generated instance: {} students (seed {})".format(STUDENTS, SEED))
+
+    reference = run(REFERENCE, classes, priorities)
+    results = [["reference", "bigM", reference]]
+    failed = False
+    for formulation in ["bigM", "clique", "lazy"]:
+        for engine in ENGINES:
+            r = run({"MODEL_ENGINE": engine, "OVERLAP_FORMULATION": formulation}, classes, priorities)
+            results.append([engine, formulation, r])
+            if abs(r["objective"] - reference["objective"]) > 1e-6:
+                failed = True
+
+    # two-stage solve with the presolve (the default): stage 2 may lose objective against the one-stage model, never gain
+    r = run({"TWO_STAGE": "1", "PRESOLVE": "1"}, classes, priorities)
+    results.append(["quicksum", "two stage", r])
+    if r["objective"] > reference["objective"] + 1e-6:
+        failed = True
+
+    print()
+    print("{:<12}{:<12}{:>14}{:>10}{:>12}{:>14}".format("engine", "formulation", "build time(s)", "rows", "nonzeros", "objective"))
+    for engine, formulation, r in results:
+        print("{:<12}{:<12}{:>14.2f}{:>10}{:>12}{:>14.2f}".format(engine, formulation, r["build time"], r["rows"], r["nonzeros"], r["objective"]))
+
+    print()
+    if failed:
+        print("[!] Objectives of the engines differ from the reference run, or the two-stage solve beats it.")
+        sys.exit(1)
+    print("Objectives of the engines match the reference run.")
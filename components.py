@@ -0,0 +1,100 @@
+import multiprocessing
+import time
+from gurobipy import Env, Model, GRB, quicksum
+
+
+'''
+Decomposition into independent components
+    Students are linked when they can take the same seat-limited title (a title whose enrollment cap could
+    bind). Students of different connected components never compete for a seat, so every component is a
+    model of its own, solved in a worker process with its own Gurobi environment and share of the threads.
+
+    rows      - [sense, columns, coefficients (None if all ones), rhs] (as in main.py): the own rows of the
+                students of the component and the enrollment caps of its titles
+    objective - objective coefficient of each column
+'''
+
+
+# Connected components of the students (union-find over the seat-limited titles)
+#   studentTitles - id -> titles the student can take
+#   limited       - titles whose seats could run out
+# Returns list of components (lists of ids), largest first
+def find_components(studentTitles: dict, limited: set) -> list:
+    parent = {i: i for i in studentTitles}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    holder = {} # title -> first student who can take it
+    for i in studentTitles:
+        for j in studentTitles[i]:
+            if j in limited:
+                if j in holder:
+                    parent[find(i)] = find(holder[j])
+                else:
+                    holder[j] = i
+
+    components = {}
+    for i in studentTitles:
+        components.setdefault(find(i), []).append(i)
+    return sorted(components.values(), key = len, reverse = True)
+
+
+# Builds and solves the model of one component (in a worker process)
+# task = (component number, columns, rows, objective {column: value}, threads, deadline (time.time()) or None, gap)
+# Returns (component number, status, value or None, bound, chosen columns)
+def _solve(task: tuple) -> tuple:
+    number, columns, rows, objective, threads, deadline, gap = task
+    with Env(params = {"OutputFlag": 0}) as env, Model("Component {}".format(number), env = env) as m:
+        m.Params.Threads = threads
+        m.Params.IntegralityFocus = 1
+        m.setParam('MIPGap', gap)
+        if deadline is not None:
+            m.Params.TimeLimit = max(deadline - time.time(), 0)
+        x = {c: m.addVar(vtype = GRB.BINARY, obj = objective[c]) for c in columns}
+        for sense, rowColumns, coefficients, rhs in rows:
+            if coefficients is None:
+                lhs = quicksum(x[c] for c in rowColumns)
+            else:
+                lhs = quicksum(coefficient * x[c] for c, coefficient in zip(rowColumns, coefficients))
+            if sense == "=":
+                m.addConstr(lhs == rhs)
+            else:
+                m.addConstr(lhs <= rhs)
+        m.ModelSense = GRB.MAXIMIZE
+        m.optimize()
+        if m.SolCount == 0:
+            return (number, m.Status, None, None, [])
+        return (number, m.Status, m.ObjVal, m.ObjBound, [c for c in columns if x[c].x > .5])
+
+
+# Solves the components in a process pool (worker processes are started fresh, so no Gurobi environment
+# is shared with this process); every worker gets an equal share of the cores as Gurobi threads
+#   tasks     - (columns, rows) of each component
+#   timeLimit - seconds for all the components together (0 = no limit)
+#   gap       - relative MIP gap at which a component stops
+# Returns list of (status, value, bound, chosen columns) per component
+def solve(tasks: list, objective, processes: int = None, timeLimit: float = 0, gap: float = 0, log = print) -> list:
+    processes = min(processes or multiprocessing.cpu_count(), max(len(tasks), 1))
+    threads = max(1, multiprocessing.cpu_count() // processes)
+    deadline = time.time() + timeLimit if timeLimit > 0 else None
+    work = [(k, columns, rows, {c: objective[c] for c in columns}, threads, deadline, gap) for k, (columns, rows) in enumerate(tasks)]
+    results = [None] * len(work)
+
+    def record(result: tuple):
+        number, status, value, bound, chosen = result
+        results[number] = (status, value, bound, chosen)
+        log(f"Component {number + 1}/{len(work)} ({len(work[number][1])} columns): "
+            + ("no solution" if value is None else f"{value:.2f}") + f" (status {status})")
+
+    if processes > 1:
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            for result in pool.imap_unordered(_solve, work):
+                record(result)
+    else:
+        for task in work:
+            record(_solve(task))
+    return results
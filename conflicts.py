@@ -0,0 +1,151 @@
+from collections import defaultdict
+from math import gcd
+
+
+# Converts a time string (ex. "09:00AM", "1:30PM") to minutes after midnight
+def time_to_minutes(time_str: str) -> int:
+    time_str = time_str.strip().upper()
+    hours, minutes = time_str[:-2].split(":")
+    hours = int(hours) % 12
+    if time_str[-2:] == "PM":
+        hours += 12
+    return hours * 60 + int(minutes)
+
+
+# Converts meetings of a class (ex. [['MWF', '10:00AM', '10:50AM']]) into
+# a list of (day, start minute, end minute) intervals, one per meeting day
+def meeting_intervals(meetings: list) -> list:
+    intervals = []
+    for days, start, end in meetings:
+        start_min = time_to_minutes(start)
+        end_min = time_to_minutes(end)
+        for day in days:
+            intervals.append((day, start_min, end_min))
+    return intervals
+
+
+# Weekly bitmask of the intervals: bit day * slotsPerDay + k is set if the class meets during the
+# k-th slot (of slot minutes) of the day; days are numbered by dayIndex (day -> number)
+def meeting_mask(intervals: list, slot: int, dayIndex: dict) -> int:
+    slotsPerDay = 24 * 60 // slot
+    mask = 0
+    for day, start, end in intervals:
+        first = dayIndex[day] * slotsPerDay + start // slot
+        last = dayIndex[day] * slotsPerDay + -(-end // slot) # end slot is not included
+        if last > first:
+            mask |= (1 << last) - (1 << first)
+    return mask
+
+
+'''
+Conflict graph of a class catalog
+    Built once from classDict (title -> class info, meetings at index [5]) and then queried
+    for every student instead of rescanning the catalog.
+
+    intervals[title] -> list of (day, start minute, end minute)
+    adjacency[title] -> set of titles that meet at the same time on at least one day
+    masks[title]     -> weekly bitmask of the meetings (see meeting_mask); two classes (or a class and a
+                        schedule, the OR of its masks) conflict if their masks AND to nonzero
+    slot             -> minutes per bit: 5, or the largest slot that divides every meeting start and end
+                        (so the masks are exact)
+'''
+class ConflictGraph:
+
+    def __init__(self, classDict: dict):
+        self.titles = list(classDict.keys())
+        self.intervals = {}
+        self.adjacency = {title: set() for title in self.titles}
+
+        by_day = defaultdict(list) # day -> [(start, end, title)]
+        for title, info in classDict.items():
+            self.intervals[title] = meeting_intervals(info[5])
+            for day, start, end in self.intervals[title]:
+                by_day[day].append((start, end, title))
+
+        # bitmasks on the largest slot (at most 5 minutes) dividing every start and end
+        self.slot = 5
+        for day in by_day:
+            for start, end, title in by_day[day]:
+                self.slot = gcd(gcd(self.slot, start), end)
+        self.slot = max(self.slot, 1)
+        self.dayIndex = {day: index for index, day in enumerate(sorted(by_day, key = lambda day: "MTWRFSU".find(day) % 8))}
+        self.masks = {title: meeting_mask(self.intervals[title], self.slot, self.dayIndex) for title in self.titles}
+
+        # sweep each day in order of start time, keeping the meetings that are still running
+        for day in by_day:
+            active = []
+            for start, end, title in sorted(by_day[day]):
+                active = [meeting for meeting in active if meeting[0] > start]
+                for active_end, active_start, other in active:
+                    if other != title and active_start < end:
+                        self.adjacency[title].add(other)
+                        self.adjacency[other].add(title)
+                active.append((end, start, title))
+
+    # titles that overlap with the given title
+    def overlaps(self, title: str) -> set:
+        return self.adjacency[title]
+
+    # True if the two titles meet at the same time
+    def conflict(self, title1: str, title2: str) -> bool:
+        return self.masks[title1] & self.masks[title2] != 0
+
+    # Bitmask of all the meetings of the titles (ex. of a schedule)
+    def mask(self, titles) -> int:
+        mask = 0
+        for title in titles:
+            mask |= self.masks[title]
+        return mask
+
+    # True if the title meets at none of the times of the mask (ex. can be added to a schedule)
+    def fits(self, title: str, mask: int) -> bool:
+        return self.masks[title] & mask == 0
+
+    # True if no two of the titles meet at the same time (ex. a schedule is valid)
+    def disjoint(self, titles) -> bool:
+        mask = 0
+        for title in titles:
+            if self.masks[title] & mask != 0:
+                return False
+            mask |= self.masks[title]
+        return True
+
+    # maximal cliques of mutually overlapping classes (among the given titles, all by default): for every day,
+    # the classes running at each meeting start time form a clique, and every conflicting pair shares at least one of them
+    def cliques(self, titles: set = None) -> list:
+        by_day = defaultdict(list) # day -> [(start, end, title)]
+        for title in self.titles if titles is None else [title for title in self.titles if title in titles]:
+            for day, start, end in self.intervals[title]:
+                by_day[day].append((start, end, title))
+
+        found = set()
+        for day in by_day:
+            meetings = sorted(by_day[day])
+            for index, (start, end, title) in enumerate(meetings):
+                if index + 1 < len(meetings) and meetings[index + 1][0] == start:
+                    continue # wait until every meeting starting at this time is active
+                running = frozenset(other for other_start, other_end, other in meetings[:index + 1] if other_end > start)
+                if len(running) > 1:
+                    found.add(running)
+
+        # keep only maximal cliques
+        cliques = []
+        for clique in sorted(found, key = len, reverse = True):
+            if not any(clique < kept for kept in cliques):
+                cliques.append(clique)
+        return cliques
+
+    # all conflicting pairs (each pair reported once)
+    def edges(self) -> list:
+        position = {title: index for index, title in enumerate(self.titles)}
+        return [(title, other) for title in self.titles for other in self.adjacency[title]
+                if position[title] < position[other]]
+
+    def __contains__(self, title: str) -> bool:
+        return title in self.adjacency
+
+    def __getitem__(self, title: str) -> set:
+        return self.adjacency[title]
+
+    def __len__(self) -> int:
+        return len(self.adjacency)
@@ -0,0 +1,171 @@
+import math
+from ortools.sat.python import cp_model
+
+
+'''
+OR-Tools CP-SAT backend of the "cpsat" engine
+    Solves the constraint rows of main.py (family -> [sense, rows], row = [columns, coefficients (None if
+    all ones), rhs]) with one Boolean variable per column. Rows of ones with right hand side 1 become
+    at-most-one constraints, and meeting times are optional intervals of each student that may not overlap
+    (NoOverlap) instead of overlap rows. CP-SAT only takes integer coefficients, so every row and the
+    objective are scaled by the smallest power of ten that makes them integer (at most SCALE_DIGITS digits,
+    rounding the right hand side down beyond that). The search runs on workers parallel workers (portfolio).
+
+    CpSatModel offers the part of the gurobipy Model interface that main.py uses after building the model
+    (optimize, update, ObjVal, ObjBound, Status, SolCount, ...; variables with x, Start, LB and UB), so
+    the starting solution, solve and export stages work unchanged. The search stops after timeLimit seconds
+    (0 = no limit) or within the relative gap of the optimum, and incumbent(values, objective, bound) is
+    called with every improved solution (values of the columns).
+'''
+
+SCALE_DIGITS = 6
+MINUTES_PER_DAY = 24 * 60
+
+# Gurobi status codes (GRB.Status) of the CP-SAT statuses
+STATUS = {cp_model.OPTIMAL: 2, cp_model.INFEASIBLE: 3, cp_model.FEASIBLE: 9, cp_model.UNKNOWN: 9, cp_model.MODEL_INVALID: 12}
+
+
+# Smallest power of ten (at most SCALE_DIGITS digits) that makes every value integer
+def scale(values) -> int:
+    for digits in range(SCALE_DIGITS + 1):
+        factor = 10 ** digits
+        if all(abs(value * factor - round(value * factor)) < 1e-6 for value in values):
+            return factor
+    return 10 ** SCALE_DIGITS
+
+
+# Variable of a CpSatModel (attributes named as in gurobipy)
+class Var:
+
+    def __init__(self, var):
+        self.var = var
+        self.x = 0
+        self.Start = None
+        self.LB = 0
+        self.UB = 1
+
+
+# Passes every improved solution of the search to incumbent(values, objective, bound)
+class _Incumbents(cp_model.CpSolverSolutionCallback):
+
+    def __init__(self, model, incumbent):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.model = model
+        self.incumbent = incumbent
+
+    def on_solution_callback(self):
+        self.incumbent([self.value(v.var) for v in self.model.vars], self.objective_value / self.model.objectiveScale,
+                       self.best_objective_bound / self.model.objectiveScale)
+
+
+class CpSatModel:
+
+    def __init__(self, name: str, workers: int = None, timeLimit: float = 0, gap: float = 0):
+        self.name = name
+        self.model = cp_model.CpModel()
+        self.vars = []
+        self.workers = workers
+        self.timeLimit = timeLimit
+        self.gap = gap
+        self.objectiveScale = 1
+        self.families = {} # family -> [rows, nonzeros]
+
+        self.Status = 1 # GRB.LOADED
+        self.SolCount = 0
+        self.Runtime = 0
+        self.IterCount = 0
+        self.NodeCount = 0
+        self.IsMIP = 1
+        self.NumConstrs = 0
+        self.NumNZs = 0
+
+    @property
+    def NumVars(self) -> int:
+        return len(self.vars)
+
+    @property
+    def NumIntVars(self) -> int:
+        return len(self.vars)
+
+    # Adds count Boolean variables (columns); returns them
+    def add_columns(self, count: int) -> list:
+        added = [Var(self.model.new_bool_var("x{}".format(len(self.vars) + k))) for k in range(count)]
+        self.vars.extend(added)
+        return added
+
+    def _count(self, family: str, rows: int, nonzeros: int):
+        counts = self.families.setdefault(family, [0, 0])
+        counts[0] += rows
+        counts[1] += nonzeros
+        self.NumConstrs += rows
+        self.NumNZs += nonzeros
+
+    # Adds the rows of a constraint family
+    def add_rows(self, family: str, sense: str, rows: list):
+        for columns, coefficients, rhs in rows:
+            variables = [self.vars[c].var for c in columns]
+            if coefficients is None and sense == "<" and rhs == 1:
+                self.model.add_at_most_one(variables)
+            else:
+                coefficients = [1] * len(columns) if coefficients is None else coefficients
+                factor = scale(list(coefficients) + [rhs])
+                lhs = cp_model.LinearExpr.weighted_sum(variables, [round(coefficient * factor) for coefficient in coefficients])
+                if sense == "=":
+                    self.model.add(lhs == round(rhs * factor))
+                else:
+                    self.model.add(lhs <= math.floor(rhs * factor + 1e-6))
+            self._count(family, 1, len(columns))
+
+    # Meeting times of one student's columns may not overlap
+    #   meetings - (column, [(day, start minute, end minute)]) of each timed column
+    #   dayIndex - day -> number (see conflicts.ConflictGraph)
+    def add_no_overlap(self, family: str, meetings: list, dayIndex: dict):
+        intervals = []
+        for c, times in meetings:
+            for day, start, end in times:
+                if end > start:
+                    intervals.append(self.model.new_optional_fixed_size_interval_var(dayIndex[day] * MINUTES_PER_DAY + start, end - start,
+                                                                                     self.vars[c].var, ""))
+        if len(intervals) > 1:
+            self.model.add_no_overlap(intervals)
+            self._count(family, 1, len(intervals))
+
+    # Objective to maximize (coefficient of each column)
+    def set_objective(self, objective: list):
+        self.objectiveScale = scale(objective)
+        self.model.maximize(cp_model.LinearExpr.weighted_sum([v.var for v in self.vars],
+                                                             [round(value * self.objectiveScale) for value in objective]))
+
+    def update(self):
+        pass
+
+    # Solves the model (callback is accepted for the gurobipy interface but not called)
+    def optimize(self, callback = None, incumbent = None):
+        model = self.model.clone()
+        for v in self.vars:
+            if v.LB > 0 or v.UB < 1:
+                model.add(v.var == round(v.LB if v.LB > 0 else v.UB))
+            if v.Start is not None:
+                model.add_hint(v.var, round(v.Start))
+
+        solver = cp_model.CpSolver()
+        if self.workers is not None:
+            solver.parameters.num_workers = self.workers
+        if self.timeLimit > 0:
+            solver.parameters.max_time_in_seconds = self.timeLimit
+        solver.parameters.relative_gap_limit = self.gap
+        status = solver.solve(model, None if incumbent is None else _Incumbents(self, incumbent))
+
+        self.Status = STATUS.get(status, 1)
+        self.Runtime = solver.wall_time
+        self.NodeCount = solver.num_branches
+        self.SolCount = 1 if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else 0
+        if self.SolCount > 0:
+            self.ObjVal = solver.objective_value / self.objectiveScale
+            self.ObjBound = solver.best_objective_bound / self.objectiveScale
+            self.MIPGap = abs(self.ObjBound - self.ObjVal) / max(abs(self.ObjVal), 1e-10)
+            for v in self.vars:
+                v.x = solver.value(v.var)
+        print("CP-SAT {} ({} workers): objective {}, bound {}, {:.2f} seconds".format(
+            solver.status_name(status), solver.parameters.num_workers or "all",
+            self.ObjVal if self.SolCount > 0 else "-", self.ObjBound if self.SolCount > 0 else "-", self.Runtime))
@@ -0,0 +1,178 @@
+import csv
+import os
+import sys
+import random
+
+# Generates a synthetic classes.csv/priorities.csv pair in the format main.py reads
+# Usage: python generate_instance.py <students> [seed] [directory]
+# The catalog grows with the number of students (about 4.4 seats per student) and has multisection
+# courses, crosslisted courses, labs, W/FYC course types and the placement courses of PLACEMENTS;
+# students rank 12 courses (popular courses more often) and have placements and AP scores.
+
+CLASS_COLUMNS = ["Dept", "Course Number", "Section", "Term", "Section Name", "Short Title", "Sec Primary Flag",
+                 "Sec Capacity", "Sched Capacity", "Total Enr", "XList Capacity", "Course Types", "Reg Restrictions",
+                 "Reg Restrictions Info Rl Description", "H Sec Bldg Room", "H Sec Bldg Room1 ", "H Sec Cross Totals",
+                 "H Sec Days ", "H Sec Time", "Location", "Sched Fac All Names", "Sec End Date", "Sec Faculty",
+                 "Sec Meeting Info", "Sec Start Date", "Sec Start Time",
+                 "Start/End Date Bldg Room Meth Days Start/End time", "Term", "Min Cred", "Sched Min Cred", "Cred Type"]
+
+STUDENT_COLUMNS = (["id", "name", "appl email", "ham email", "admit status", "complete", "in transition table", "housing",
+                    "purposes/goals", "area 1", "area 2", "area 3", "new area 1", "new area 2", "new area 3",
+                    "fyc 1", "fyc 2", "fyc 3", "wi 1", "wi 2", "wi 3", "qsr 1", "qsr 2", "qsr 3", "placement exams",
+                    "off campus study", "location", "languages studied", "languages planned", "graduate education",
+                    "health profession", "health profession other"]
+                   + ["priority {}".format(k) for k in range(1, 13)]
+                   + ["AP {}".format(k) for k in range(1, 16)]
+                   + ["placements", "HEOP"])
+
+# regular meeting patterns (days, start, end)
+SLOTS = [("MWF", "08:00AM", "08:50AM"), ("MWF", "09:00AM", "09:50AM"), ("MWF", "10:00AM", "10:50AM"),
+         ("MWF", "11:00AM", "11:50AM"), ("MWF", "12:00PM", "12:50PM"), ("MW", "01:00PM", "02:15PM"),
+         ("MW", "02:30PM", "03:45PM"), ("TR", "08:30AM", "09:45AM"), ("TR", "10:00AM", "11:15AM"),
+         ("TR", "11:30AM", "12:45PM"), ("TR", "01:00PM", "02:15PM"), ("TR", "02:30PM", "03:45PM"),
+         ("MWF", "01:00PM", "01:50PM"), ("W", "07:00PM", "09:30PM")]
+LAB_SLOTS = [("M", "01:00PM", "04:00PM"), ("T", "01:00PM", "04:00PM"), ("W", "01:00PM", "04:00PM"),
+             ("R", "01:00PM", "04:00PM"), ("F", "01:00PM", "04:00PM")]
+
+# placement courses (dept, number, title) by level, as in PLACEMENTS of main.py
+PLACEMENT_COURSES = [("MATH", "113", "CALCULUS I"), ("MATH", "116", "CALCULUS II"),
+                     ("MATH", "216", "MULTIVARIABLE CALCULUS"), ("MATH", "224W", "LINEAR ALGEBRA"),
+                     ("FRNCH", "110", "ELEMENTARY FRENCH"), ("FRNCH", "140", "INTERMEDIATE FRENCH I"),
+                     ("FRNCH", "200", "INTERMEDIATE FRENCH II"), ("ECON", "100", "INTRODUCTION TO ECONOMICS"),
+                     ("ECON", "166", "ECON THEORY & EVIDENCE"), ("CPSCI", "101", "COMPUTER SCIENCE FOR ALL"),
+                     ("CPSCI", "102", "DESIGN PRINCIPLES"), ("HSPST", "110", "SPANISH IMMERSION I"),
+                     ("HSPST", "130", "THIRD TERM SPANISH"), ("HSPST", "200", "GRAMMAR AND COMPOSITION")]
+PLACEMENT_STRINGS = ["", "", "Calculus: MATH 113/116", "Calculus: MATH 116/216", "Calculus: MATH 216",
+                     "French: FRNCH 140", "Calculus: MATH 113/116, French: FRNCH 140", "Spanish: HSPST 130",
+                     "Calculus: MATH 113 FYC", "Spanish: HSPST 200+"]
+AP_EXAMS = ["CALCAB", "CALCBC", "MICRO", "MACRO", "ENLANG", "ENLIT", "CPSCI", "ABSUB", "USHIST", "BIO", "CHEM"]
+
+DEPARTMENTS = ["ART", "DANCE", "MUSIC", "THETR", "PHYS", "BIO", "CHEM", "CPSCI", "GEOSC", "MATH", "PSYCH",
+               "ARTH", "CLASC", "FRNCH", "HSPST", "LIT", "PHIL", "HIST", "ANTHR", "ECON", "EDUC", "GOVT",
+               "LING", "SOC", "AFRST", "AMST", "CHNSE", "ENVST", "GERMN", "JAPN", "RELST", "WMGST"]
+LAB_DEPARTMENTS = ["PHYS", "BIO", "CHEM", "GEOSC", "PSYCH"]
+WORDS = ["INTRO", "TOPICS", "FOUNDATIONS", "SURVEY", "PRINCIPLES", "ISSUES", "METHODS", "THEMES", "STUDIES",
+         "READINGS", "PRACTICE", "WORLDS", "HISTORY", "THEORY", "CULTURE", "SCIENCE", "SOCIETY", "MEDIA"]
+
+
+# One classes.csv row
+def class_row(dept: str, number: str, section: int, title: str, capacity: int, courseTypes: str,
+              meetings: list, credit: str, xlistCapacity: str = "") -> list:
+    method = "LAB" if number.endswith("L") else "LEC"
+    meetingInfo = "\n".join("08/29/24 12/13/24 TBA  TBA      {}  {} {} {}".format(method, days, start, end)
+                            for days, start, end in meetings)
+    row = dict.fromkeys(CLASS_COLUMNS, "")
+    row.update({"Dept": dept, "Course Number": number, "Section": str(section), "Short Title": title,
+                "Sched Capacity": str(capacity), "Total Enr": "0", "XList Capacity": xlistCapacity,
+                "Course Types": courseTypes, "Start/End Date Bldg Room Meth Days Start/End time": meetingInfo,
+                "Sched Min Cred": credit})
+    return [row[column] for column in CLASS_COLUMNS]
+
+
+# Catalog for the given number of students
+# Returns (rows of classes.csv, course names students can rank with their popularity weights)
+def generate_classes(rng: random.Random, students: int) -> tuple:
+    rows = []
+    courseNames = [] # course names students rank
+    weights = []
+    sections = max(8, round(students * 4.4 / 20)) # about 20 seats per section
+
+    # placement courses (multisection at the lower levels)
+    for level, (dept, number, title) in enumerate(PLACEMENT_COURSES):
+        count = max(1, round(sections * 0.02) - level % 3)
+        types = "FYC" if title == "CALCULUS I" else ("W" if number.endswith("W") else "")
+        for section in range(1, count + 1):
+            rows.append(class_row(dept, number, section, title, rng.randint(16, 30), types, [rng.choice(SLOTS)], "1"))
+        courseNames.append("{} {}".format(dept, number))
+        weights.append(3.0 * count)
+    sections -= len(rows)
+
+    # regular courses until the sections run out
+    used = set((dept, number) for dept, number, title in PLACEMENT_COURSES)
+    while sections > 0:
+        dept = rng.choice(DEPARTMENTS)
+        number = str(rng.randint(100, 299))
+        if (dept, number) in used:
+            continue
+        used.add((dept, number))
+        title = "{} {} {}".format(rng.choice(WORDS), dept, number)
+        kind = rng.random()
+        count = 1 if kind < 0.7 else rng.randint(2, 4) # multisection
+        types = rng.choice(["", "", "", "W", "FYC", "W FYC"])
+        if "W" in types:
+            number += "W"
+        capacity = 16 if "FYC" in types else rng.randint(12, 35)
+        for section in range(1, count + 1):
+            meetings = [rng.choice(SLOTS)]
+            rows.append(class_row(dept, number, section, title, capacity, types, meetings, "1"))
+        courseNames.append("{} {}".format(dept, number))
+        weights.append(rng.paretovariate(1.5)) # a few very popular courses
+        sections -= count
+
+        # crosslisted in another department (same title and meetings)
+        if kind > 0.9:
+            other = rng.choice(DEPARTMENTS)
+            if other != dept and not (other, number) in used:
+                used.add((other, number))
+                rows.append(class_row(other, number, 1, title, capacity, types, meetings, "1", str(capacity)))
+                courseNames.append("{} {}".format(other, number))
+                weights.append(weights[-1] / 2)
+
+        # lecture with lab sections (labs are not ranked, students get one with the lecture)
+        elif dept in LAB_DEPARTMENTS and kind > 0.6 and not number.endswith("W"):
+            used.add((dept, number + "L"))
+            for section in range(1, count + 2):
+                rows.append(class_row(dept, number + "L", section, title + " LAB", 14, "", [rng.choice(LAB_SLOTS)], "0"))
+            sections -= 1
+    return rows, courseNames, weights
+
+
+# One priorities.csv row per student
+def generate_students(rng: random.Random, students: int, courseNames: list, weights: list) -> list:
+    rows = []
+    for k in range(students):
+        # weighted sample without replacement
+        ranked = []
+        while len(ranked) < min(12, len(courseNames)):
+            courseName = rng.choices(courseNames, weights)[0]
+            if not courseName in ranked:
+                ranked.append(courseName)
+        # students often leave out the W of writing intensive courses
+        ranked = [courseName[:-1] if courseName.endswith("W") and rng.random() < 0.3 else courseName for courseName in ranked]
+
+        row = dict.fromkeys(STUDENT_COLUMNS, "")
+        row.update({"id": str(10000000 + k), "name": "Student {}".format(k), "ham email": "student{}@hamilton.edu".format(k),
+                    "area 1": rng.choice(DEPARTMENTS), "area 2": rng.choice(DEPARTMENTS), "area 3": rng.choice(DEPARTMENTS),
+                    "graduate education": rng.choice(["", "Law", "Medicine", "Business"]),
+                    "placements": rng.choice(PLACEMENT_STRINGS), "HEOP": "Yes" if rng.random() < 0.05 else "No"})
+        for rank, courseName in enumerate(ranked):
+            row["priority {}".format(rank + 1)] = courseName
+        for index, exam in enumerate(rng.sample(AP_EXAMS, rng.randint(0, 5))):
+            row["AP {}".format(index + 1)] = "{}*{}".format(exam, rng.randint(1, 5))
+        rows.append([row[column] for column in STUDENT_COLUMNS])
+    return rows
+
+
+# Writes classes.csv and priorities.csv for the given number of students into directory
+def generate(students: int, seed: int = 0, directory: str = "."):
+    rng = random.Random(seed)
+    classRows, courseNames, weights = generate_classes(rng, students)
+    studentRows = generate_students(rng, students, courseNames, weights)
+
+    with open(os.path.join(directory, "classes.csv"), "w", newline = "", encoding = "utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(CLASS_COLUMNS)
+        writer.writerows(classRows)
+    with open(os.path.join(directory, "priorities.csv"), "w", newline = "", encoding = "utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(STUDENT_COLUMNS)
+        writer.writerows(studentRows)
+    return len(classRows)
+
+
+if __name__ == "__main__":
+    students = int(sys.argv[1])
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    directory = sys.argv[3] if len(sys.argv) > 3 else "."
+    rows = generate(students, seed, directory)
+    print("Generated {} sections and {} students in {}".format(rows, students, os.path.abspath(directory)))
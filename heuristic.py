@@ -0,0 +1,71 @@
+import random
+from schedules import best_schedule
+
+
+'''
+Greedy assignment heuristic
+    Randomized serial dictatorship: students take turns (in a random order where students with more
+    valuable schedules tend to go first) and each takes the best schedule that fits the seats left.
+    Then local search: every student in turn gives up their schedule and takes the best one that fits
+    the seats left by everybody else, until no student improves.
+
+    subproblems - representative -> [count, columns, lunchGroups, rows, objective, titles]
+                  (same as lagrangian.solve)
+    seats       - title -> seats of the titles whose seats could run out
+'''
+
+
+# Best schedule of the representative among the classes that still have seats
+# Returns (value, columns)
+def _best_fitting(subproblem: list, left: dict) -> tuple:
+    count, columns, lunchGroups, rows, objective, titles = subproblem
+    open_columns = [c for c in columns if left.get(titles[c], 1) > 0]
+    groups = [[c for c in group if left.get(titles[c], 1) > 0] for group in lunchGroups]
+    return best_schedule(open_columns, groups, rows, objective)
+
+
+def _take(subproblem: list, columns: tuple, left: dict, sign: int):
+    titles = subproblem[5]
+    for c in columns:
+        if titles[c] in left:
+            left[titles[c]] -= sign
+
+
+# Runs the heuristic rounds times and keeps the best assignment
+# Returns (value, rep -> [columns of the schedule of each student of the type])
+def assign(subproblems: dict, seats: dict, rounds: int = 5, seed: int = 0, log = print) -> tuple:
+    rng = random.Random(seed)
+    students = [(rep, k) for rep in subproblems for k in range(subproblems[rep][0])]
+    weight = {rep: max(best_schedule(*subproblems[rep][1:5])[0], 1e-9) for rep in subproblems}
+
+    bestValue = None
+    bestSchedules = None
+    for r in range(rounds):
+        order = sorted(students, key = lambda student: -rng.random() ** (1 / weight[student[0]]))
+        left = dict(seats)
+        chosen = {}
+        for student in order:
+            subproblem = subproblems[student[0]]
+            chosen[student] = _best_fitting(subproblem, left)
+            _take(subproblem, chosen[student][1], left, 1)
+
+        # local search
+        improved = True
+        while improved:
+            improved = False
+            for student in order:
+                subproblem = subproblems[student[0]]
+                _take(subproblem, chosen[student][1], left, -1)
+                schedule = _best_fitting(subproblem, left)
+                if schedule[0] > chosen[student][0] + 1e-9:
+                    chosen[student] = schedule
+                    improved = True
+                _take(subproblem, chosen[student][1], left, 1)
+
+        value = sum(schedule[0] for schedule in chosen.values())
+        log(f"Heuristic round {r + 1}: {value:.2f}")
+        if bestValue is None or value > bestValue:
+            bestValue = value
+            bestSchedules = {rep: [chosen[rep, k][1] for k in range(subproblems[rep][0])] for rep in subproblems}
+
+    return bestValue, bestSchedules
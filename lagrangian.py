@@ -0,0 +1,138 @@
+import multiprocessing
+from schedules import best_schedule
+
+
+'''
+Lagrangian decomposition of the schedule choice
+    The enrollment caps are the only constraints shared by students. They are moved into the
+    objective with a price per seat, so every student (type) picks its own best schedule
+    independently (in a process pool), and the prices are updated by subgradient steps.
+
+    subproblems - representative -> [count, columns, lunchGroups, rows, objective, titles]
+                  count = number of students of the type, objective/titles = column -> value/title
+                  (see schedules.ScheduleSearch for columns, lunchGroups and rows)
+    seats       - title -> seats of the titles whose seats could run out
+'''
+
+# subproblems of the worker processes (set by the pool initializer)
+_subproblems = {}
+
+
+def _init(subproblems: dict):
+    global _subproblems
+    _subproblems = subproblems
+
+
+# Best schedule of each representative at the given seat prices
+# Returns list of (representative, columns of the schedule)
+def _solve(task: tuple) -> list:
+    reps, prices = task
+    result = []
+    for rep in reps:
+        count, columns, lunchGroups, rows, objective, titles = _subproblems[rep]
+        reduced = {c: objective[c] - prices.get(titles[c], 0) for c in columns}
+        value, schedule = best_schedule(columns, lunchGroups, rows, reduced)
+        result.append((rep, schedule))
+    return result
+
+
+# Makes the schedules fit the seats: students keep their schedule if every seat-limited title
+# still has room, otherwise they get the best schedule of their pool that fits
+# Returns total value of the schedules
+def repair(chosen: dict, pools: dict, subproblems: dict, seats: dict) -> float:
+    left = dict(seats)
+    total = 0
+
+    def fits(titles) -> bool:
+        return all(left[j] > 0 for j in titles if j in left)
+
+    for rep in chosen:
+        for student in range(subproblems[rep][0]):
+            schedule = chosen[rep]
+            if not fits(schedule[1]):
+                schedule = max((s for s in pools[rep] if fits(s[1])), key = lambda s: s[0])
+            for j in schedule[1]:
+                if j in left:
+                    left[j] -= 1
+            total += schedule[0]
+    return total
+
+
+# Runs the subgradient method
+#   pools - rep -> list of (value, titles) of the schedules known so far, must include a schedule
+#           that uses no seat-limited titles; every schedule a subproblem returns is added to it
+# Returns (best bound, best feasible value, history)
+#   history - list of [iteration, bound, feasible value, gap] per iteration
+def solve(subproblems: dict, seats: dict, pools: dict, iterations: int = 50, processes: int = None, log = print) -> tuple:
+    prices = {j: 0.0 for j in seats}
+    known = {rep: set(frozenset(titles) for value, titles in pools[rep]) for rep in subproblems}
+    bestBound = float("inf")
+    bestValue = 0
+    history = []
+    theta = 2.0
+    stalled = 0
+
+    reps = list(subproblems)
+    processes = processes or multiprocessing.cpu_count()
+    chunks = [reps[k::processes] for k in range(processes)]
+    pool = None
+    # worker processes get the subproblems by fork; without fork (Windows) the subproblems are solved in this process
+    if processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+        pool = multiprocessing.get_context("fork").Pool(processes, initializer = _init, initargs = (subproblems,))
+    else:
+        _init(subproblems)
+
+    try:
+        for iteration in range(1, iterations + 1):
+            tasks = [(chunk, prices) for chunk in chunks if len(chunk) > 0]
+            results = pool.map(_solve, tasks) if pool is not None else [_solve(task) for task in tasks]
+
+            # bound: every student takes its best priced schedule, plus the price of all seats
+            bound = sum(prices[j] * seats[j] for j in seats)
+            demand = {j: 0 for j in seats}
+            chosen = {}
+            for result in results:
+                for rep, columns in result:
+                    count, repColumns, lunchGroups, rows, objective, titles = subproblems[rep]
+                    scheduleTitles = [titles[c] for c in columns]
+                    value = sum(objective[c] for c in columns)
+                    bound += count * (value - sum(prices.get(j, 0) for j in scheduleTitles))
+                    for j in scheduleTitles:
+                        if j in demand:
+                            demand[j] += count
+                    chosen[rep] = (value, scheduleTitles)
+                    if not frozenset(scheduleTitles) in known[rep]:
+                        known[rep].add(frozenset(scheduleTitles))
+                        pools[rep].append((value, scheduleTitles))
+
+            value = repair(chosen, pools, subproblems, seats)
+            bestValue = max(bestValue, value)
+            if bound < bestBound - 1e-6:
+                bestBound = bound
+                stalled = 0
+            else:
+                stalled += 1
+                if stalled >= 5:
+                    theta /= 2
+                    stalled = 0
+
+            gap = (bestBound - bestValue) / max(abs(bestBound), 1e-9)
+            history.append([iteration, bound, value, gap])
+            log(f"Iteration {iteration}: bound {bound:.2f}, feasible {value:.2f}, gap {gap * 100:.2f}%")
+            if gap < 1e-6:
+                break
+
+            # subgradient step on the prices (Polyak step size)
+            subgradient = {j: seats[j] - demand[j] for j in seats}
+            norm = sum(g * g for g in subgradient.values())
+            if norm == 0:
+                break
+            step = theta * (bound - bestValue) / norm
+            for j in seats:
+                prices[j] = max(0.0, prices[j] - step * subgradient[j])
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return bestBound, bestValue, history
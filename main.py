@@ -1,12 +1,27 @@
+import argparse
 import csv
+import json
+import os
+import hashlib
+import pickle
 import time
 import sys
 from gurobipy import *
 from collections import *
-from datetime import datetime
-from copy import deepcopy
-from math import ceil
+from types import SimpleNamespace
 from pandas import DataFrame, ExcelWriter
+from scipy.sparse import csr_matrix
+import numpy as np
+from conflicts import ConflictGraph
+from titles import TitleIndex
+from schedules import enumerate_schedules, best_schedule, remove_dominated
+import lagrangian
+import heuristic
+import two_stage
+import components
+import presolve
+from report import RunReport
+from arrays import Rankings, ClassArrays, priority_matrix, ranked
 
 
 # TODO: add other AP conversion to placement
@@ -63,6 +78,7 @@ DIVISIONS = { "arts" : ["ART", "DANCE", "DARTS", "MUSIC", "THETR"],
                                     "GERMN", "ITALN", "JAPN", "MDRST", "MEIWS", "RELST",
                                     "RSNST", "WMGST", "JLJS", "LTAM", "COLEG" ]
 }
+DIVISION_LIMIT = 3 # classes a student can take in one division
 
 # titles that do not count towards writing intensive constraint
 NOT_WRITING_INTENSIVE = ["WRITTEN & ORAL ARGUMENTATN", "EXPLORING HISPANIC TEXTS", "LINEAR ALGEBRA"] 
@@ -73,6 +89,92 @@ NOT_FYC = ["CALCULUS I"]
 # Ignore these courseNames
 IGNORE = ["PHYS 100L"]
 
+# Formulation of the overlapping times constraints (can be set with the OVERLAP_FORMULATION environment variable)
+# "bigM"   -> one big-M row per student per class
+# "clique" -> one row per student per maximal clique of mutually overlapping classes (tighter and smaller)
+# "lazy"   -> the clique rows are left out of the model and only added (Gurobi lazy constraints) when a new
+#             solution violates them ("quicksum" and "matrix" engines; the other engines use them as "clique")
+OVERLAP_FORMULATION = os.environ.get("OVERLAP_FORMULATION", "bigM")
+
+# How the model is passed to Gurobi (can be set with the MODEL_ENGINE environment variable)
+# "quicksum" -> row by row with quicksum/addConstr
+# "matrix"   -> each constraint family as one sparse matrix with addMVar/addMConstr
+# "schedules" -> feasible schedules of each student are enumerated and the model picks one schedule
+#                per student subject to the enrollment caps (set packing)
+# "types"    -> as "schedules", but students with identical preferences are grouped into types, and the
+#               model has one integer variable per (type, schedule) counting students with that schedule
+# "lagrangian" -> as "schedules", but seat caps are priced out and each student picks its best schedule
+#                 in parallel (subgradient method); the model is then solved over the schedules found
+# "cpsat"    -> the rows of the "quicksum" model solved by OR-Tools CP-SAT on PROCESSES workers (needs ortools,
+#               no Gurobi license is used); meeting times are NoOverlap constraints instead of overlap rows
+MODEL_ENGINE = os.environ.get("MODEL_ENGINE", "quicksum")
+SCHEDULE_ENGINES = ["schedules", "types", "lagrangian"]
+
+# Greedy heuristic assignment (can be set with the HEURISTIC environment variable)
+# ""      -> not used
+# "start" -> the heuristic assignment is the starting solution (MIP start) of the model
+# "only"  -> preview: the heuristic assignment is the result, the model is not solved
+HEURISTIC = os.environ.get("HEURISTIC", "")
+HEURISTIC_ROUNDS = 5 # random student orders tried by the heuristic
+
+# Schedules of every run are saved to SOLUTION_FILE (student id -> titles). Set WARM_START (or the
+# WARM_START environment variable) to such a file to start the model from that solution.
+SOLUTION_FILE = "solution.json"
+WARM_START = os.environ.get("WARM_START", "")
+
+# Incremental run for late students and seat changes: set INCREMENTAL (or the INCREMENTAL environment
+# variable) to the SOLUTION_FILE of the previous run. Students of that run keep their schedules and are
+# left out of the model, except the ones whose schedule no longer fits (classes or seats changed) and at
+# most MOVE_LIMIT students holding seats that the others want. Students who move get STAY_BONUS for
+# every class they keep.
+INCREMENTAL = os.environ.get("INCREMENTAL", "")
+MOVE_LIMIT = 20
+STAY_BONUS = 1
+
+# Two-stage solve (can be set with the TWO_STAGE environment variable, "" = off; quicksum and matrix engines)
+# Stage 1 picks the courses of every student on a model where the sections of a multisection course are one
+# course (their seats added up), stage 2 solves the model over the sections of these courses only and then
+# evens out the sections. The quality loss is reported against the stage 1 bound of the one-stage model.
+TWO_STAGE = os.environ.get("TWO_STAGE", "")
+
+# Decomposition (can be set with the DECOMPOSE environment variable, "" = off; quicksum and matrix engines)
+# Students who cannot take the same seat-limited class never compete for a seat, so every connected component
+# of students is solved as a model of its own in PROCESSES worker processes (students linked to nobody take
+# their best schedule). The solution is the schedules of all components, the full model is never built; TIME_LIMIT
+# and MIP_GAP apply to the components.
+DECOMPOSE = os.environ.get("DECOMPOSE", "")
+
+# Presolve (can be set with the PRESOLVE environment variable, "" = off): before the model is built, classes beaten by
+# a better class with seats for everyone meeting within their times are dropped, and students whose best schedule
+# only takes classes with seats for everyone get it and are left out of the model (see presolve.py)
+PRESOLVE = os.environ.get("PRESOLVE", "1")
+
+# Anytime solve: the solve stops after TIME_LIMIT seconds (0 = no limit) or once the solution is proven within
+# MIP_GAP of the optimum (can be set with the TIME_LIMIT and MIP_GAP environment variables). Every improved
+# solution is written to CHECKPOINT_FILE ("" = off) with the bound, so the schedules can be exported with
+# "python main.py export --checkpoint" while the solve runs or after it stopped.
+TIME_LIMIT = float(os.environ.get("TIME_LIMIT", "0"))
+MIP_GAP = float(os.environ.get("MIP_GAP", "0"))
+CHECKPOINT_FILE = os.environ.get("CHECKPOINT_FILE", "checkpoint.json")
+
+# Students (types) with more feasible schedules than this get their schedules by column generation
+SCHEDULE_LIMIT = 5000
+
+# The parsed catalog (classes.csv) is cached in CATALOG_CACHE (or the CATALOG_CACHE environment variable,
+# "" to turn it off), keyed by the content of classes.csv and the constants used by the parsing
+# [!] increase CATALOG_CACHE_VERSION when the parsing of classes.csv changes
+CATALOG_CACHE = os.environ.get("CATALOG_CACHE", ".catalog_cache")
+CATALOG_CACHE_VERSION = 3
+
+# Phases (wall/cpu time, peak memory), rows and nonzeros of each constraint family and Gurobi statistics
+# of every run are written to REPORT_FILE
+REPORT_FILE = "report.json"
+
+# Subgradient iterations of the "lagrangian" engine, worker processes of the "lagrangian" engine and of
+# DECOMPOSE (None = all cores)
+LAGRANGIAN_ITERATIONS = 50
+PROCESSES = None
+
 # For printing messages
 class bcolors:
     HEADER = '\033[95m'
@@ -89,11 +191,6 @@ class bcolors:
 
 # Utility functions
 
-# Helper function to convert time string to datetime object
-def time_to_datetime(time_str: str) -> datetime:
-    return datetime.strptime(time_str, '%I:%M%p')
-
-
 # Loading message
 def load_log(percentage: int):
     message = f"Progress -- {percentage}%"
@@ -104,57 +201,25 @@ def load_log(percentage: int):
         sys.stdout.flush()
 
 
-# Helper function to check if two time intervals overlap
-def times_overlap(start1: datetime, end1: datetime, start2: datetime, end2: datetime) -> bool:
-    return start1 < end2 and start2 < end1
-
-
-# Main function to find overlapping classes
-def find_overlapping_classes(classDict: dict, target_class: str) -> list:
-    target_meetings = classDict[target_class][5]
-    overlapping_classes = []
-
-    for class_title, class_info in classDict.items():
-        if class_title == target_class:
-            continue
-
-        for target_days, target_start, target_end in target_meetings:
-            target_start_dt = time_to_datetime(target_start)
-            target_end_dt = time_to_datetime(target_end)
-
-            for days, start, end in class_info[5]:
-                start_dt = time_to_datetime(start)
-                end_dt = time_to_datetime(end)
-
-                # Check if there is any overlap in the days
-                if any(day in days for day in target_days):
-                    # Check if the times overlap
-                    if times_overlap(target_start_dt, target_end_dt, start_dt, end_dt):
-                        overlapping_classes.append(class_title)
-                        break
+# Saves schedules of the students (id -> titles) as json (with the bound on the objective of a checkpoint)
+# The saved objective leaves out the STAY_BONUS of an incremental run (saved as "stay bonus"), so it compares
+# with the objective of a full run; the bound is on the objective with the stay bonus, as the model's
+def save_solution(path: str, assigned: dict, objective: float = None, bound: float = None, stayBonus: float = 0):
+    saved = {"objective": objective if objective is None else objective - stayBonus, "schedules": {i: sorted(assigned[i]) for i in assigned}}
+    if stayBonus > 0:
+        saved["stay bonus"] = stayBonus
+    if bound is not None:
+        saved["bound"] = bound
+    with open(path + ".tmp", "w") as f:
+        json.dump(saved, f, indent = 1)
+    os.replace(path + ".tmp", path)
 
-    return overlapping_classes
 
-
-# Looks up studentDict by courseName (Ex. PHYS 100)
-# Returns tuple (True, title) if found, or (False, courseName) if not found
-def findTitle(courseName: str) -> tuple:
-
-    # if someone specified only department (comment out if don't want to assign priority to these students)
-    if courseName in one_class_dept:
-        return (True, one_class_dept[courseName])
-
-    # check crosslisted coursenames
-    for title in crossListed:
-        if courseName in crossListed[title]:
-            return (True, title)
-        
-    # check all others
-    for index, info in enumerate(classDict.values()):
-        if courseName == info[2]:
-            return (True, list(classDict.keys())[index])
-        
-    return (False, courseName)
+# Loads schedules saved by save_solution
+# Returns dict id -> titles
+def load_solution(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)["schedules"]
 
 
 # Extracts days and times of class meetings
@@ -200,7 +265,7 @@ def extractTimes(timeInfo: str) -> list:
 # Extracts placement information from the string
 # Input: placement info section as a string
 # Returns list of placements by titles, for now ([True, <Title>] or [False, <Course Name>])
-def extractPlacements(placementInfo: str) -> list:
+def extractPlacements(placementInfo: str, titleIndex: TitleIndex) -> list:
     placements = []
     if "French: FRNCH 211, 212, 250 or 280" in placementInfo:
         start = ""
@@ -220,12 +285,12 @@ def extractPlacements(placementInfo: str) -> list:
     for placement in placementInfo:
         try:
             courseName = placement.split(":")[1].strip().upper()
-            found, placementTitle = findTitle(courseName)
+            found, placementTitle = titleIndex.find(courseName)
 
             if not found:
-                found, placementTitle = findTitle(courseName[:-1])
+                found, placementTitle = titleIndex.find(courseName[:-1])
                 if not found:
-                    found, placementTitle = findTitle(courseName + "W")
+                    found, placementTitle = titleIndex.find(courseName + "W")
                     if not found:
                         placementTitle = courseName
 
@@ -274,700 +339,1508 @@ def sortData(data: list, sortBy: list = ["Short Title", "Section"]) -> list:
     return [header] + rows
 
 
+# ------------------------------------------------------------------------------
+# PIPELINE
+# load_catalog -> load_students -> build_model -> solve -> export, each stage takes the results of the
+# stages before it, so expensive stages can be run once and reused (ex. one catalog for many runs).
+# Settings are the module constants above (ex. main.MODEL_ENGINE = "types" before build_model).
+
+STAGES = ["catalog", "students", "build", "solve", "export"]
+
+
+# Parses the classes (classes.csv)
+# Returns dict of the parsed structures (cached in CATALOG_CACHE): classDict (see the Class Dictionary template),
+# departments, labs, multiSection, crossListed, one_class_dept, non_full, no_meetings, the conflict graph
+# and the course name -> title index
+def parse_catalog(path: str) -> dict:
+    # Process Classes Info (classes.csv)
+
+    # first-year courses
+    with open(path, encoding='utf-8-sig') as csv_file:
+        rawdata = csv.reader(csv_file, delimiter = ',')
+        classInfo = [row for row in rawdata]
+    classInfo = sortData(classInfo)
+    indexList = classInfo[0]
+
+
+    '''
+    Class Dictionary template
+    [key] title: Title of class  -> list of class info under unique title or section if multisection
+    classInfo:
+    [0] - courseDept: department 
+    [1] - courseNum: course number
+    [2] - courseName: course name -- used to look up class in preferences
+    [3] - courseSection: section number
+    [4] - seats: available seats -- seats = capacity - total enrolled
+            [!] for crosslisted courses, refer to crossListed dict for available seats
+
+    [5] - meetings: 2D list with meeting info including days, start time, end time strings
+          (ex. [['MWF', '10:00AM', '10:50AM'], ['TR', '10:30AM', '11:45AM']])
+
+    [6] - credit: credit number
+    [7] - isWI: 1 if course is counted towards writing intensive constraint; 0, otherwise
+    [8] - isFYC: 1 if course is counted towards FYC constraint; 0, otherwise
+    [last] - meetingMask: weekly bitmask of the meetings, added once all classes are read (see ConflictGraph);
+             two classes overlap if their masks AND to nonzero
+    '''
+    classDict = {}
+
+    departments = {} # holds titles for each department (dept -> [titles])
+    labs = {} # lab titles -> course name (Ex. "MECHANICAL UNIV LAB" -> "PHYS 190L")
+    multiSection = {} # class titles with multiple sections -> list of titles of all sections (title -> [title, title-2, ...])
+    crossListed = {} # class titles that are cross listed in other deparments -> list of course names under that title
+                    # i.e title -> [courseName1, courseName2, ...] 
+    one_class_dept = {} # departments that offer one class (dept -> title)
+    non_full = {} # classes without full credits
+    no_meetings = [] # classes with no meeting information available
+
+
+
+    # Record info about each class in classDict
+
+    for row in classInfo[1:]:
+        title = row[indexList.index("Short Title")]
+        courseDept = row[indexList.index("Dept")]
+        courseNum = row[indexList.index("Course Number")]
+        courseSection = row[indexList.index("Section")]
+        totalCap = row[indexList.index("Sched Capacity")] if row[indexList.index("XList Capacity")] == "" else row[indexList.index("XList Capacity")] 
+        totalEnrolled = row[indexList.index("Total Enr")]
+        credit = float(row[indexList.index("Sched Min Cred")])
+        courseType = row[indexList.index("Course Types")]
 
+        isWI = 0
+        if "W" in row[indexList.index("Course Types")]:
+            if not title in NOT_WRITING_INTENSIVE:
+                isWI = 1 # writing intensive course
 
-print()
-print(f"{bcolors.BOLD}{bcolors.OKCYAN}Proccesing CSV files...{bcolors.ENDC}\n")
+        isFYC = 0
+        if "FYC" in courseType and not title in NOT_FYC:
+            isFYC = 1 # FYC course
 
-#---------------------------------------------------------------------------------
-# Process Classes Info (classes.csv)
+        if not courseDept in one_class_dept:
+            one_class_dept[courseDept] = title
+        else:
+            if one_class_dept[courseDept] != title:
+                one_class_dept[courseDept] = "N/A"
 
-# first-year courses
-with open('classes.csv', encoding='utf-8-sig') as csv_file:
-    sortBy = ['Short Title', 'Section']
-    rawdata = csv.reader(csv_file, delimiter = ',')
-    classInfo = [row for row in rawdata]
-classInfo = sortData(classInfo)
-indexList = classInfo[0]
+        seats = int(totalCap) - int(totalEnrolled)
+        if seats < 0:
+            seats = 0
 
+        courseName = " ".join([courseDept, courseNum])
 
-'''
-Class Dictionary template
-[key] title: Title of class  -> list of class info under unique title or section if multisection
-classInfo:
-[0] - courseDept: department 
-[1] - courseNum: course number
-[2] - courseName: course name -- used to look up class in preferences
-[3] - courseSection: section number
-[4] - seats: available seats -- seats = capacity - total enrolled
-        [!] for crosslisted courses, refer to crossListed dict for available seats
+        if courseName in IGNORE:
+            continue
 
-[5] - meetings: 2D list with meeting info including days, start time, end time strings
-      (ex. [['MWF', '10:00AM', '10:50AM'], ['TR', '10:30AM', '11:45AM']])
+        meetingInfo = row[indexList.index("Start/End Date Bldg Room Meth Days Start/End time")]
+        meetings = extractTimes(meetingInfo)
 
-[6] - credit: credit number
-[7] - isWI: 1 if course is counted towards writing intensive constraint; 0, otherwise
-[8] - isFYC: 1 if course is counted towards FYC constraint; 0, otherwise
-'''
-classDict = {}
+        # Class does not meet/could not find relative information
+        if meetings is None:
+            no_meetings.append(title + " : No information given")
+            continue
 
-departments = {} # holds titles for each department (dept -> [titles])
-labs = {} # lab titles -> course name (Ex. "MECHANICAL UNIV LAB" -> "PHYS 190L")
-multiSection = {} # class titles with multiple sections -> list of titles of all sections (title -> [title, title-2, ...])
-crossListed = {} # class titles that are cross listed in other deparments -> list of course names under that title
-                # i.e title -> [courseName1, courseName2, ...] 
-one_class_dept = {} # departments that offer one class (dept -> title)
-non_full = {} # classes without full credits
-no_meetings = [] # classes with no meeting information available
+        elif len(meetings) == 0:
+            no_meetings.append(title)
 
+        # record labs (title -> courseName) into labs dict
+        if "L" in courseNum and not (title in labs):
+            labs[title] = courseName
+            credit = 0
 
+        if title in classDict:
 
-# Record info about each class in classDict
+            # Record crossListed courses (title -> remaining seats) into crossListed dict
+            if courseDept != classDict[title][0]:
+                if title not in crossListed:
+                    crossListed[title] = [classDict[title][2], courseName]
+                else:
+                    crossListed[title].append(courseName)
+                    classDict[title][4] = min(seats, classDict[title][4])
+                continue
 
-for row in classInfo[1:]:
-    title = row[indexList.index("Short Title")]
-    courseDept = row[indexList.index("Dept")]
-    courseNum = row[indexList.index("Course Number")]
-    courseSection = row[indexList.index("Section")]
-    totalCap = row[indexList.index("Sched Capacity")] if row[indexList.index("XList Capacity")] == "" else row[indexList.index("XList Capacity")] 
-    totalEnrolled = row[indexList.index("Total Enr")]
-    credit = float(row[indexList.index("Sched Min Cred")])
-    courseType = row[indexList.index("Course Types")]
+            # Record multisection courses (title -> [title, title-2, title-3,...]) in multiSection dict
+            elif courseDept == classDict[title][0] and not (title in multiSection):
+                multiSection[title] = [title]
+                multiSection[title].append(title + "-" + courseSection)
+            elif courseDept == classDict[title][0] and title in multiSection:
+                multiSection[title].append(title + "-" + courseSection)
 
-    isWI = 0
-    if "W" in row[indexList.index("Course Types")]:
-        if not title in NOT_WRITING_INTENSIVE:
-            isWI = 1 # writing intensive course
+            classDict[title + "-" + courseSection] = [courseDept, courseNum, courseName, courseSection, seats, meetings, meetingInfo, credit, isWI, courseType, isFYC]
+        else:
+            classDict[title] = [courseDept, courseNum, courseName, courseSection, seats, meetings, meetingInfo, credit, isWI, courseType, isFYC]
 
-    isFYC = 0
-    if "FYC" in courseType and not title in NOT_FYC:
-        isFYC = 1 # FYC course
+    # record title into corresponding department within departments dict
+    for title in classDict:
+        if not title in labs and not title[:-2] in labs and not title in crossListed: # labs are okay but crosslisted need to be changed in the future
+            dept = classDict[title][0]
+            if dept in departments:
+                departments[dept].append(title)
+            else:
+                departments[dept] = [title]
 
-    if not courseDept in one_class_dept:
-        one_class_dept[courseDept] = title
-    else:
-        if one_class_dept[courseDept] != title:
-            one_class_dept[courseDept] = "N/A"
+    lunch_times = ["11:00AM", "11:30AM", "12:00PM", "12:30PM", "1:00PM", "1:30PM", "2:00PM"]
 
-    seats = int(totalCap) - int(totalEnrolled)
-    if seats < 0:
-        seats = 0
+    # record lunches as classes in the classDict and add them to multiSection courses by day
+    for day in "MTWRF":
+        multiSection["Lunch " + day] = []
+        for index, start in enumerate(lunch_times):
+            title = "LUNCH " + day + " " + start
+            courseDept = "lunch"
+            courseNum = "lunch"
+            courseName = "lunch"
+            courseSection = day
+            seats = 1000
+            if index + 1 < len(lunch_times):
+                end = lunch_times[index + 1]
+            else:
+                end = "2:30PM" # end time for the last lunch (change if last lunch is not 2PM)
+            meetings = [[day, start, end]]
+            credit = 0.00001
+            isWI = 0
+            isFYC = 0
+            courseType = "N/A"
+            classDict[title] = [courseDept, courseNum, courseName, courseSection, seats, meetings, meetingInfo, credit, isWI, courseType, isFYC]
+            multiSection["Lunch " + day].append(title)
+
+    # conflict graph of all classes (title -> titles meeting at the same time), shared by every student
+    conflictGraph = ConflictGraph(classDict)
+    for title in classDict:
+        classDict[title].append(conflictGraph.masks[title])
 
-    courseName = " ".join([courseDept, courseNum])
-    
-    if courseName in IGNORE:
-        continue
 
-    meetingInfo = row[indexList.index("Start/End Date Bldg Room Meth Days Start/End time")]
-    meetings = extractTimes(meetingInfo)
+    # deletes unnecesary titles from one_class_dept
+    one_class_dept1 = one_class_dept.copy()
+    for i in one_class_dept1:
+        if one_class_dept1[i] == "N/A":
+            del one_class_dept[i]
 
-    # Class does not meet/could not find relative information
-    if meetings is None:
-        no_meetings.append(title + " : No information given")
-        continue
+    # course name -> title lookups (department-only names, crosslisted names, course names)
+    titleIndex = TitleIndex(classDict, crossListed, one_class_dept)
 
-    elif len(meetings) == 0:
-        no_meetings.append(title)
-    
-    # record labs (title -> courseName) into labs dict
-    if "L" in courseNum and not (title in labs):
-        labs[title] = courseName
-        credit = 0
-    
-    if title in classDict:
+    return {"classDict": classDict, "departments": departments, "labs": labs, "multiSection": multiSection,
+            "crossListed": crossListed, "one_class_dept": one_class_dept, "non_full": non_full, "no_meetings": no_meetings,
+            "conflictGraph": conflictGraph, "titleIndex": titleIndex}
 
-        # Record crossListed courses (title -> remaining seats) into crossListed dict
-        if courseDept != classDict[title][0]:
-            if title not in crossListed:
-                crossListed[title] = [classDict[title][2], courseName]
-            else:
-                crossListed[title].append(courseName)
-                classDict[title][4] = min(seats, classDict[title][4])
-            continue
-        
-        # Record multisection courses (title -> [title, title-2, title-3,...]) in multiSection dict
-        elif courseDept == classDict[title][0] and not (title in multiSection):
-            multiSection[title] = [title]
-            multiSection[title].append(title + "-" + courseSection)
-        elif courseDept == classDict[title][0] and title in multiSection:
-            multiSection[title].append(title + "-" + courseSection)
-
-        classDict[title + "-" + courseSection] = [courseDept, courseNum, courseName, courseSection, seats, meetings, meetingInfo, credit, isWI, courseType, isFYC]
-    else:
-        classDict[title] = [courseDept, courseNum, courseName, courseSection, seats, meetings, meetingInfo, credit, isWI, courseType, isFYC]
-    
-# record title into corresponding department within departments dict
-for title in classDict:
-    if not title in labs and not title[:-2] in labs and not title in crossListed: # labs are okay but crosslisted need to be changed in the future
-        dept = classDict[title][0]
-        if dept in departments:
-            departments[dept].append(title)
-        else:
-            departments[dept] = [title]
-
-lunch_times = ["11:00AM", "11:30AM", "12:00PM", "12:30PM", "1:00PM", "1:30PM", "2:00PM"]
-
-# record lunches as classes in the classDict and add them to multiSection courses by day
-for day in "MTWRF":
-    multiSection["Lunch " + day] = []
-    for index, start in enumerate(lunch_times):
-        title = "LUNCH " + day + " " + start
-        courseDept = "lunch"
-        courseNum = "lunch"
-        courseName = "lunch"
-        courseSection = day
-        seats = 1000
-        if index + 1 < len(lunch_times):
-            end = lunch_times[index + 1]
-        else:
-            end = "2:30PM" # end time for the last lunch (change if last lunch is not 2PM)
-        meetings = [[day, start, end]]
-        credit = 0.00001
-        isWI = 0
-        isFYC = 0
-        courseType = "N/A"
-        classDict[title] = [courseDept, courseNum, courseName, courseSection, seats, meetings, meetingInfo, credit, isWI, courseType, isFYC]
-        multiSection["Lunch " + day].append(title)
-
-classTitles, courseDept, courseNum, courseName, courseSection, seats, meetings, meetingInfo, credit, isWI, courseType, isFYC = multidict(classDict)
-          
-
-# deletes unnecesary titles from one_class_dept
-one_class_dept1 = one_class_dept.copy()
-for i in one_class_dept1:
-    if one_class_dept1[i] == "N/A":
-        del one_class_dept[i]
-        
-# Preliminary information recordings about class
-
-# Information about each class sections and meetings
-with open("classes.txt", 'w') as f:
-    for i in classDict:
-        if i in crossListed:
-            f.write("XList ({}) ".format(crossListed[i]))
-        if i in labs:
-            f.write("LAB ({}) ".format(labs[i][:-1]))
-        f.write(i + " meeting: \n")
-        count = 1
-        if len(classDict[i][5]) == 0:
-            f.write("TBA sec: " +  classDict[i][3] + " with {} open seats\n".format(classDict[i][4]))
-        else:
-            for k in classDict[i][5]:
-                f.write(" ".join(k) + " sec: " +  classDict[i][3] + " with {} open seats\n".format(classDict[i][4]) )
-        count += 1
-        f.write("\n")
-
-# Classes that have no meeting information
-with open("noMeetings.txt", "w") as f:
-    f.write("Classes with no meeting information found \n\n\n")
-    for i in no_meetings:
-        f.write(i + "\n")
-
-# Information about multisection courses
-with open('multisection.txt', 'w') as f:
-    f.write("Multisection Courses \n\n\n")
-    for i in multiSection:
-        f.write(i + " " + str(multiSection[i]) + "\n")
-
-# Information about crosslisted courses
-with open('crosslisted.txt', 'w') as f:
-    f.write("Crosslisted courses \n\n\n")
-    for i in crossListed:
-        f.write(i + " " + str(crossListed[i]) + "\n")
-
-# Information about classes grouped by departments
-with open("departments.txt", "w") as f:
-    f.write("Courses grouped by departments\n")
-    f.write("[!] Note these do not include crosslisted courses (each student has a personal departments dict) and labs.\n\n")
-    for d in departments:
-        f.write(d + ":")
-        f.write(str(departments[d]))
-        f.write("\n\n")
-
-#---------------------------------------------------------------------------------
-# Student Info (priorities.csv)
-
-
-# process csv file
-studentInfo = []
-with open('priorities.csv', encoding='utf-8-sig') as csv_file:
-    rawdata = csv.reader(csv_file, delimiter = ',')
-    studentInfo = [row for row in rawdata]
-indexList = studentInfo[0]
-
-
-'''
-Student Dict template
-    [key] id -> [priorities, placements, title_to_courseName, studentDepts, name, email]
-    [0] - priorities = dictionary of all classes
-        class -> ranking (0 if it is not in any of priorities)
-    [1] - placements = list of exam placements
-    [2] - title_to_courseName = dict of courseNames used in preferences of each student
-        title -> courseName
-    [3] - studentDepts = dictionary of courses grouped by departments where crosslisted courses
-                    are in the department of what student specified
-            dept -> [course titles]
-    [4] - name = name of the student
-    [5] - email = email of the student
-    [6] - majorInterest = area1 + area2 + area3 of student excel sheet
-    [7] - stuType = 01 (Full time) or 02 (Full Time HEOP)
-    [8] - grad = Graduate Education info
-    
-'''
-studentDict = {}
-
-notfound = [] # for courses that were not found at all 
-unique_placements = [] # unique placements
-no_priorities = [] # students with no priorities specified
-studentsWrongPlacement = {} # id -> [[placements that are higher/not found, original choice, original courseName]]
-
-# Record information about each student in studentDict
-
-for row in studentInfo[1:]:
-    id = row[indexList.index("id")] # student's id
-    name = row[indexList.index("name")]
-    email = row[indexList.index("ham email")]
-    adjustment = 0 # used for skipping a class in priority list
-    priorities = {} # classes ranking
-    title_to_courseName = {} # title -> courseName dict used to extract department from student preferences
-    studentDepts = deepcopy(departments) # titles of classes under specified departments by student
-    ap_exams = {} # ap exam -> score
-    exploredTitles = [] # used to check if a person put the same class under two different departments/course names
-                        # which will ultimately ignore already explored titles
-    majorInterest = "1) " + row[indexList.index("area 1")] + " 2) " + row[indexList.index("area 2")] + " 3) " + row[indexList.index("area 3")]
-    stuType = "02 (Full Time HEOP)" if "y" in row[indexList.index("HEOP")].lower() else "01 (Full Time)"
-    grad = row[indexList.index("graduate education")]
-    # skip students with no priorities and record them later
-    if row[indexList.index('priority 1')] == "":
-        no_priorities.append([name, id])
-        continue
-
-    placementInfo = row[indexList.index('placements')]
-    placements = extractPlacements(placementInfo) # tuples of [found (true/false), title/coursename] of extracted placements
-    
-    for p in placements:
-        if not p[1] in unique_placements:
-            unique_placements.append(p[1])
-
-    for i in range(15):
-        ap = row[indexList.index('AP 1')+i]
-        if ap == "":
-            break
-        ap = ap.split("*")
-        ap_exams[ap[0]] = int(ap[1])
-    
-    placements = convertAPtoPlacements(ap_exams, placements)
 
-    # Initialize all classes to be 0
-    for title in classDict:
-        priorities[title] = 0
+# Cache file of the parsed catalog: named by the hash of classes.csv, the parsing constants and the cache version
+def catalog_cache_file(path: str) -> str:
+    key = hashlib.sha256()
+    with open(path, "rb") as f:
+        key.update(f.read())
+    key.update(json.dumps([IGNORE, NOT_FYC, NOT_WRITING_INTENSIVE, CATALOG_CACHE_VERSION]).encode())
+    return os.path.join(CATALOG_CACHE, "catalog-" + key.hexdigest()[:32] + ".pickle")
 
-    # assign lunch priorities
-    for day in "MTWRF":
-        for index, lunch in enumerate(multiSection["Lunch " + day]):
-            priorities[lunch] = LUNCH_PRIORITY
-            if index == len(multiSection["Lunch " + day]) - 1:
-                priorities[lunch] = LUNCH2PM_PRIORITY
-            
-    visited = {} # placements already counted for, so adjusment is correct
-    for dept in PLACEMENTS:
-        visited[dept] = False
 
-    for i in range(12):
-        shortTitle = row[indexList.index('priority 1')+i].upper()
-        found, title = findTitle(shortTitle)
+# Reads the classes (classes.csv, or its parsed structures from CATALOG_CACHE) and writes the class information files
+# Returns the catalog: the parsed structures (see parse_catalog), the columns of classDict (classTitles, seats, meetings, ...)
+def load_catalog(path: str = "classes.csv", report: RunReport = None) -> SimpleNamespace:
+    report = report or RunReport()
+    report.phase("read classes")
+
+    print()
+    print(f"{bcolors.BOLD}{bcolors.OKCYAN}Proccesing CSV files...{bcolors.ENDC}\n")
+
+    parsed = None
+    cacheFile = catalog_cache_file(path) if CATALOG_CACHE != "" else ""
+    if cacheFile != "" and os.path.exists(cacheFile):
         try:
-            dept = shortTitle.split()[0]
-        except:
-            dept = shortTitle
+            with open(cacheFile, "rb") as f:
+                parsed = pickle.load(f)
+            print(f"{bcolors.OKCYAN}Catalog loaded from {cacheFile}.{bcolors.ENDC}")
+        except Exception: # unreadable cache file (ex. interrupted write of an older version): parse again
+            parsed = None
+    if parsed is None:
+        parsed = parse_catalog(path)
+        if cacheFile != "":
+            os.makedirs(CATALOG_CACHE, exist_ok = True)
+            with open(cacheFile + ".tmp", "wb") as f:
+                pickle.dump(parsed, f)
+            os.replace(cacheFile + ".tmp", cacheFile)
+
+    classDict, departments, labs, multiSection, crossListed, no_meetings = (parsed["classDict"], parsed["departments"], parsed["labs"],
+                                                                            parsed["multiSection"], parsed["crossListed"], parsed["no_meetings"])
+    classTitles, courseDept, courseNum, courseName, courseSection, seats, meetings, meetingInfo, credit, isWI, courseType, isFYC, meetingMask = multidict(classDict)
+    classArrays = ClassArrays(classTitles, classDict, DIVISIONS) # the columns as arrays by class index
+
+    # Preliminary information recordings about class
+
+    # Information about each class sections and meetings
+    with open("classes.txt", 'w') as f:
+        for i in classDict:
+            if i in crossListed:
+                f.write("XList ({}) ".format(crossListed[i]))
+            if i in labs:
+                f.write("LAB ({}) ".format(labs[i][:-1]))
+            f.write(i + " meeting: \n")
+            count = 1
+            if len(classDict[i][5]) == 0:
+                f.write("TBA sec: " +  classDict[i][3] + " with {} open seats\n".format(classDict[i][4]))
+            else:
+                for k in classDict[i][5]:
+                    f.write(" ".join(k) + " sec: " +  classDict[i][3] + " with {} open seats\n".format(classDict[i][4]) )
+            count += 1
+            f.write("\n")
+
+    # Classes that have no meeting information
+    with open("noMeetings.txt", "w") as f:
+        f.write("Classes with no meeting information found \n\n\n")
+        for i in no_meetings:
+            f.write(i + "\n")
 
-        if title in exploredTitles or title in notfound or title in labs:
-            adjustment += 1
+    # Information about multisection courses
+    with open('multisection.txt', 'w') as f:
+        f.write("Multisection Courses \n\n\n")
+        for i in multiSection:
+            f.write(i + " " + str(multiSection[i]) + "\n")
+
+    # Information about crosslisted courses
+    with open('crosslisted.txt', 'w') as f:
+        f.write("Crosslisted courses \n\n\n")
+        for i in crossListed:
+            f.write(i + " " + str(crossListed[i]) + "\n")
+
+    # Information about classes grouped by departments
+    with open("departments.txt", "w") as f:
+        f.write("Courses grouped by departments\n")
+        f.write("[!] Note these do not include crosslisted courses (each student has a personal departments dict) and labs.\n\n")
+        for d in departments:
+            f.write(d + ":")
+            f.write(str(departments[d]))
+            f.write("\n\n")
+
+    return SimpleNamespace(**parsed, classTitles = classTitles, courseDept = courseDept, courseNum = courseNum, courseName = courseName,
+                           courseSection = courseSection, seats = seats, meetings = meetings, meetingInfo = meetingInfo,
+                           credit = credit, isWI = isWI, courseType = courseType, isFYC = isFYC, meetingMask = meetingMask,
+                           classArrays = classArrays)
+
+
+# Reads the students' preferences (priorities.csv) and writes the student information files
+# Returns the students: studentDict (see the Student Dict template), its columns (id, priorities, placements, ...),
+# students without priorities and students whose placement ignored one of their choices
+def load_students(catalog: SimpleNamespace, path: str = "priorities.csv", report: RunReport = None) -> SimpleNamespace:
+    report = report or RunReport()
+    departments, labs, multiSection, crossListed, titleIndex = (catalog.departments, catalog.labs, catalog.multiSection,
+                                                                catalog.crossListed, catalog.titleIndex)
+    # Looks up studentDict by courseName (Ex. PHYS 100) in the prebuilt titleIndex
+    # Returns tuple (True, title) if found, or (False, courseName) if not found
+    findTitle = titleIndex.find
+    titleIndex.misses.clear() # misses of this file only when the catalog is reused
+    classIndex = catalog.classArrays.index
+
+    report.phase("read students")
+
+
+    # process csv file
+    studentInfo = []
+    with open(path, encoding='utf-8-sig') as csv_file:
+        rawdata = csv.reader(csv_file, delimiter = ',')
+        studentInfo = [row for row in rawdata]
+    indexList = studentInfo[0]
+
+
+    '''
+    Student Dict template
+        [key] id -> [priorities, placements, title_to_courseName, studentDepts, name, email]
+        [0] - priorities = Rankings of the classes
+            class -> ranking (0 if it is not in any of priorities, only nonzero rankings are stored)
+        [1] - placements = list of exam placements
+        [2] - title_to_courseName = dict of courseNames used in preferences of each student
+            title -> courseName
+        [3] - studentDepts = dictionary of courses grouped by departments where crosslisted courses
+                        are in the department of what student specified
+                dept -> [course titles]
+        [4] - name = name of the student
+        [5] - email = email of the student
+        [6] - majorInterest = area1 + area2 + area3 of student excel sheet
+        [7] - stuType = 01 (Full time) or 02 (Full Time HEOP)
+        [8] - grad = Graduate Education info
+
+    '''
+    studentDict = {}
+
+    notfound = [] # for courses that were not found at all 
+    unique_placements = [] # unique placements
+    no_priorities = [] # students with no priorities specified
+    studentsWrongPlacement = {} # id -> [[placements that are higher/not found, original choice, original courseName]]
+
+    # Record information about each student in studentDict
+
+    for row in studentInfo[1:]:
+        id = row[indexList.index("id")] # student's id
+        name = row[indexList.index("name")]
+        email = row[indexList.index("ham email")]
+        adjustment = 0 # used for skipping a class in priority list
+        priorities = Rankings() # classes ranking (only ranked classes are stored, the others are 0)
+        title_to_courseName = {} # title -> courseName dict used to extract department from student preferences
+        studentDepts = dict(departments) # titles of classes under specified departments by student
+                                         # (lists are shared with departments, a changed department gets a new list)
+        ap_exams = {} # ap exam -> score
+        exploredTitles = [] # used to check if a person put the same class under two different departments/course names
+                            # which will ultimately ignore already explored titles
+        majorInterest = "1) " + row[indexList.index("area 1")] + " 2) " + row[indexList.index("area 2")] + " 3) " + row[indexList.index("area 3")]
+        stuType = "02 (Full Time HEOP)" if "y" in row[indexList.index("HEOP")].lower() else "01 (Full Time)"
+        grad = row[indexList.index("graduate education")]
+        # skip students with no priorities and record them later
+        if row[indexList.index('priority 1')] == "":
+            no_priorities.append([name, id])
             continue
-        
-        rank = 12 - i + adjustment
 
-        if not found:
-            found, title = findTitle(shortTitle + "W") # adjust for writing intensive courses
-            if title in exploredTitles or title in notfound:
+        placementInfo = row[indexList.index('placements')]
+        placements = extractPlacements(placementInfo, titleIndex) # tuples of [found (true/false), title/coursename] of extracted placements
+
+        for p in placements:
+            if not p[1] in unique_placements:
+                unique_placements.append(p[1])
+
+        for i in range(15):
+            ap = row[indexList.index('AP 1')+i]
+            if ap == "":
+                break
+            ap = ap.split("*")
+            ap_exams[ap[0]] = int(ap[1])
+
+        placements = convertAPtoPlacements(ap_exams, placements)
+
+        # assign lunch priorities
+        for day in "MTWRF":
+            for index, lunch in enumerate(multiSection["Lunch " + day]):
+                priorities[lunch] = LUNCH_PRIORITY
+                if index == len(multiSection["Lunch " + day]) - 1:
+                    priorities[lunch] = LUNCH2PM_PRIORITY
+
+        visited = {} # placements already counted for, so adjusment is correct
+        for dept in PLACEMENTS:
+            visited[dept] = False
+
+        for i in range(12):
+            shortTitle = row[indexList.index('priority 1')+i].upper()
+            found, title = findTitle(shortTitle)
+            try:
+                dept = shortTitle.split()[0]
+            except:
+                dept = shortTitle
+
+            if title in exploredTitles or title in notfound or title in labs:
                 adjustment += 1
                 continue
 
-            if found:
-                print("Adjusting priority for student {}: from {} to {} at {}".format(id, shortTitle, shortTitle + "W", rank))
+            rank = 12 - i + adjustment
 
-            else:
-                found, title = findTitle(shortTitle[:-1]) # adjust for non-writing intensive courses
+            if not found:
+                found, title = findTitle(shortTitle + "W") # adjust for writing intensive courses
                 if title in exploredTitles or title in notfound:
                     adjustment += 1
                     continue
 
                 if found:
-                    print("Adjusting priority for student {}: from {} to {} at {}".format(id, shortTitle, shortTitle[:-1], rank))
+                    print("Adjusting priority for student {}: from {} to {} at {}".format(id, shortTitle, shortTitle + "W", rank))
 
                 else:
-                    notfound.append(shortTitle)
-                    notfound.append(" no alternatives found...")
-                    adjustment += 1
-                    continue
-
-        exploredTitles.append(title)
-
-        # Placement precedence over preferences
-        if dept in PLACEMENTS:
-            placementFound = False
-
-            if title in PLACEMENTS[dept]:
+                    found, title = findTitle(shortTitle[:-1]) # adjust for non-writing intensive courses
+                    if title in exploredTitles or title in notfound:
+                        adjustment += 1
+                        continue
 
-                if visited[dept]:
-                    adjustment += 1
-                    continue
-                else:
-                    visited[dept] = True
-
-                for found, placement in placements:
-                    
-                    if found and placement in PLACEMENTS[dept]:
-                        placementFound = True
-                        if placement != title:
-                            title = placement
-                            exploredTitles.append(title)
-                            break
+                    if found:
+                        print("Adjusting priority for student {}: from {} to {} at {}".format(id, shortTitle, shortTitle[:-1], rank))
 
-                    elif not found and placement in SPECIAL_PLACEMENT_CASES and list(SPECIAL_PLACEMENT_CASES[placement].keys())[0] in PLACEMENTS[dept]:  
-                        for j in SPECIAL_PLACEMENT_CASES[placement]:
-                            if SPECIAL_PLACEMENT_CASES[placement][j] == 0:
-                                adjustment += 1
-                                if id in studentsWrongPlacement:
-                                    studentsWrongPlacement[id].append([placement, 13 - rank, shortTitle])
-                                else:
-                                    studentsWrongPlacement[id] = [[placement, 13 - rank, shortTitle]]
-                                
-                            priorities[j] = round(rank * SPECIAL_PLACEMENT_CASES[placement][j])
-                            title_to_courseName[j] = shortTitle
-                            if j in multiSection:
-                                for sec in multiSection[j]:
-                                    priorities[sec] = round(rank * SPECIAL_PLACEMENT_CASES[placement][j])
-                                    title_to_courseName[sec] = shortTitle
-                            exploredTitles.append(j)
-                        placementFound = True
-                        rank = 0
-                        break
-                        
-
-                # if no placement found, default should be level 1 class
-                if not placementFound:
-                    if not dept in REQUIRED_PLACEMENT:
-                        title = PLACEMENTS[dept][0]
-                        exploredTitles.append(title)
-                    else: # except for the departments that require placements
+                    else:
+                        notfound.append(shortTitle)
+                        notfound.append(" no alternatives found...")
                         adjustment += 1
                         continue
 
-        # add title to the student picked department if crosslisted
-        if title in crossListed:
-            if dept in studentDepts:
-                studentDepts[dept].append(title)
-            else:
-                studentDepts[dept] = [title]
+            exploredTitles.append(title)
 
-        if rank == 0:
-            continue
-        
-        priorities[title] = rank
-        title_to_courseName[title] = shortTitle
-
-        # add preferences for all sections
-        if title in multiSection:
-            for sec in multiSection[title]:
-                priorities[sec] = rank
-                title_to_courseName[sec] = shortTitle
+            # Placement precedence over preferences
+            if dept in PLACEMENTS:
+                placementFound = False
 
-    studentDict[id] = [priorities, placements, title_to_courseName, studentDepts, name, email, majorInterest, stuType, grad]
+                if title in PLACEMENTS[dept]:
 
-id, priorities, placements, title_to_courseName, studentDepts, name, email, majorInterest, stuType, grad = multidict(studentDict)
+                    if visited[dept]:
+                        adjustment += 1
+                        continue
+                    else:
+                        visited[dept] = True
+
+                    for found, placement in placements:
+
+                        if found and placement in PLACEMENTS[dept]:
+                            placementFound = True
+                            if placement != title:
+                                title = placement
+                                exploredTitles.append(title)
+                                break
+
+                        elif not found and placement in SPECIAL_PLACEMENT_CASES and list(SPECIAL_PLACEMENT_CASES[placement].keys())[0] in PLACEMENTS[dept]:  
+                            for j in SPECIAL_PLACEMENT_CASES[placement]:
+                                if SPECIAL_PLACEMENT_CASES[placement][j] == 0:
+                                    adjustment += 1
+                                    if id in studentsWrongPlacement:
+                                        studentsWrongPlacement[id].append([placement, 13 - rank, shortTitle])
+                                    else:
+                                        studentsWrongPlacement[id] = [[placement, 13 - rank, shortTitle]]
+
+                                priorities[j] = round(rank * SPECIAL_PLACEMENT_CASES[placement][j])
+                                title_to_courseName[j] = shortTitle
+                                if j in multiSection:
+                                    for sec in multiSection[j]:
+                                        priorities[sec] = round(rank * SPECIAL_PLACEMENT_CASES[placement][j])
+                                        title_to_courseName[sec] = shortTitle
+                                exploredTitles.append(j)
+                            placementFound = True
+                            rank = 0
+                            break
 
-# Preliminary information recordings about students
 
-# Unique placements found
-with open("unique_placements.txt", "w") as f:
-    f.write("All unique placements found on students preferences\n\n\n")
-    for p in unique_placements:
-        f.write(p + "\n")
+                    # if no placement found, default should be level 1 class
+                    if not placementFound:
+                        if not dept in REQUIRED_PLACEMENT:
+                            title = PLACEMENTS[dept][0]
+                            exploredTitles.append(title)
+                        else: # except for the departments that require placements
+                            adjustment += 1
+                            continue
 
-# Classes on preference sheet that were not found in tour guide
-with open('notfound.txt', 'w') as f:
-    f.write("Courses chosen by students that were not found on Tour Guide\n\n\n")
-    for i in notfound:
-        try:
-            if not i[0] == " ":
-                f.write(i)
-            else:
-                f.write(i + "\n")
-        except:
-            f.write(i + "\n")
+            # add title to the student picked department if crosslisted
+            if title in crossListed:
+                studentDepts[dept] = studentDepts.get(dept, []) + [title]
 
-# Information about student's preferences and placements
-with open("students.txt", 'w') as f:
-    f.write("Students' preferences/choices and placements \n\n")
-    f.write("[!] Note that the highest score is the top priority, and the highest for each student should be 12.\n\n")
-    for i in studentDict:
-        f.write("{} {} ({}) priorities: \n".format(studentDict[i][4], i, studentDict[i][5]))
-        for j in studentDict[i][0]:
-            if studentDict[i][0][j] != 0 and not "LUNCH" in j:
-                f.write(" " + j + " " + str(studentDict[i][0][j]) + "\n")
-        f.write("\n")
-        f.write("Placements: \n")
-        for j in studentDict[i][1]:
-            f.write(str(j[0]) + " " + j[1] + "\n")
-        f.write("\n")
+            if rank == 0:
+                continue
 
+            priorities[title] = rank
+            title_to_courseName[title] = shortTitle
 
-print()
-print(f"\r{bcolors.BOLD}{bcolors.OKCYAN}Done.{bcolors.ENDC}")
-print()
+            # add preferences for all sections
+            if title in multiSection:
+                for sec in multiSection[title]:
+                    priorities[sec] = rank
+                    title_to_courseName[sec] = shortTitle
 
-print(bcolors.OKGREEN + "[!] Check 'students.txt' for assigned preferences." + bcolors.ENDC)
-print(bcolors.OKGREEN + "[!] Check 'classes.txt' for meeting info of each class." + bcolors.ENDC)
-print(bcolors.OKGREEN + "[!] Check 'multisection.txt' for multisection courses." + bcolors.ENDC)
-print(bcolors.OKGREEN + "[!] Check 'crosslisted.txt' for cross listed dictionary information." + bcolors.ENDC)
-print(bcolors.OKGREEN + "[!] Check 'departments.txt' for department info." + bcolors.ENDC)
-print(bcolors.OKGREEN + "[!] Check 'notfound.txt' for course names in students' preferences but not found on tour guide." + bcolors.ENDC)
-print(bcolors.OKGREEN + "[!] Check 'unique_placements.txt' for unique placements found in students' preferences." + bcolors.ENDC)
-print(bcolors.OKGREEN + "[!] Check 'noMeetings.txt' for classes with no meeting information." + bcolors.ENDC)
+        studentDict[id] = [priorities, placements, title_to_courseName, studentDepts, name, email, majorInterest, stuType, grad]
 
+    id, priorities, placements, title_to_courseName, studentDepts, name, email, majorInterest, stuType, grad = multidict(studentDict)
 
+    # rankings as a sparse students x classes matrix (row of a student in studentIndex, column = class index)
+    studentIndex = {i: row for row, i in enumerate(id)}
+    priorityMatrix = priority_matrix(id, priorities, catalog.classArrays)
 
-print()
-print(f"\r{bcolors.BOLD}{bcolors.OKCYAN}Building the model.{bcolors.ENDC}")
+    # Preliminary information recordings about students
 
-#-------------------------------------------------------------------------------------------------
-print()
+    # Unique placements found
+    with open("unique_placements.txt", "w") as f:
+        f.write("All unique placements found on students preferences\n\n\n")
+        for p in unique_placements:
+            f.write(p + "\n")
 
+    # Classes on preference sheet that were not found in tour guide
+    with open('notfound.txt', 'w') as f:
+        f.write("Courses chosen by students that were not found on Tour Guide\n\n\n")
+        for i in notfound:
+            try:
+                if not i[0] == " ":
+                    f.write(i)
+                else:
+                    f.write(i + "\n")
+            except:
+                f.write(i + "\n")
 
-# MODEL
-M = len(classTitles)
+        # every course name lookup that missed, including the W/non-W variants tried for each preference
+        f.write("\n\nCourse name lookups not found (course name: misses)\n\n")
+        for missedName, missCount in titleIndex.misses.most_common():
+            f.write("{}: {}\n".format(missedName, missCount))
+
+    # Information about student's preferences and placements
+    with open("students.txt", 'w') as f:
+        f.write("Students' preferences/choices and placements \n\n")
+        f.write("[!] Note that the highest score is the top priority, and the highest for each student should be 12.\n\n")
+        for i in studentDict:
+            f.write("{} {} ({}) priorities: \n".format(studentDict[i][4], i, studentDict[i][5]))
+            for j in sorted(studentDict[i][0], key = lambda j: classIndex.get(j, len(classIndex))): # classDict order
+                if studentDict[i][0][j] != 0 and not "LUNCH" in j:
+                    f.write(" " + j + " " + str(studentDict[i][0][j]) + "\n")
+            f.write("\n")
+            f.write("Placements: \n")
+            for j in studentDict[i][1]:
+                f.write(str(j[0]) + " " + j[1] + "\n")
+            f.write("\n")
+
+
+    print()
+    print(f"\r{bcolors.BOLD}{bcolors.OKCYAN}Done.{bcolors.ENDC}")
+    print()
+
+    print(bcolors.OKGREEN + "[!] Check 'students.txt' for assigned preferences." + bcolors.ENDC)
+    print(bcolors.OKGREEN + "[!] Check 'classes.txt' for meeting info of each class." + bcolors.ENDC)
+    print(bcolors.OKGREEN + "[!] Check 'multisection.txt' for multisection courses." + bcolors.ENDC)
+    print(bcolors.OKGREEN + "[!] Check 'crosslisted.txt' for cross listed dictionary information." + bcolors.ENDC)
+    print(bcolors.OKGREEN + "[!] Check 'departments.txt' for department info." + bcolors.ENDC)
+    print(bcolors.OKGREEN + "[!] Check 'notfound.txt' for course names in students' preferences but not found on tour guide." + bcolors.ENDC)
+    print(bcolors.OKGREEN + "[!] Check 'unique_placements.txt' for unique placements found in students' preferences." + bcolors.ENDC)
+    print(bcolors.OKGREEN + "[!] Check 'noMeetings.txt' for classes with no meeting information." + bcolors.ENDC)
+
+    return SimpleNamespace(studentDict = studentDict, id = id, priorities = priorities, placements = placements,
+                           title_to_courseName = title_to_courseName, studentDepts = studentDepts, name = name, email = email,
+                           majorInterest = majorInterest, stuType = stuType, grad = grad, no_priorities = no_priorities,
+                           studentsWrongPlacement = studentsWrongPlacement, notfound = notfound, unique_placements = unique_placements,
+                           studentIndex = studentIndex, priorityMatrix = priorityMatrix)
+
+
+# Builds the model of the engine set by MODEL_ENGINE
+# Returns the model m with its variables (x or z), the constraint rows and objective it was built from and
+# the student data of the model (eligible classes, types, rows, ...)
+def build_model(catalog: SimpleNamespace, students: SimpleNamespace, report: RunReport = None) -> SimpleNamespace:
+    report = report or RunReport()
+    classTitles, conflictGraph, labs, multiSection, seats = (catalog.classTitles, catalog.conflictGraph, catalog.labs, catalog.multiSection,
+                                                             catalog.seats)
+    id, priorities, studentDepts, studentDict = students.id, students.priorities, students.studentDepts, students.studentDict
+    classArrays, studentIndex, priorityMatrix = catalog.classArrays, students.studentIndex, students.priorityMatrix
+    findTitle = catalog.titleIndex.find
+
+    print()
+    print(f"\r{bcolors.BOLD}{bcolors.OKCYAN}Building the model.{bcolors.ENDC}")
+
+    #-------------------------------------------------------------------------------------------------
+    print()
+
+
+    # MODEL
+    M = len(classTitles)
+
+    if MODEL_ENGINE == "cpsat":
+        if TWO_STAGE != "" or DECOMPOSE != "":
+            # both solve Gurobi models of their own
+            sys.exit(f"{bcolors.FAIL}TWO_STAGE and DECOMPOSE need Gurobi, they cannot be used with the cpsat engine.{bcolors.ENDC}")
+        import cpsat # optional dependency (ortools), only needed by this engine
+        m = cpsat.CpSatModel("Student Registration", workers = PROCESSES, timeLimit = TIME_LIMIT, gap = MIP_GAP)
+    else:
+        m = Model("Student Registration")
 
-m = Model("Student Registration")
+        # PARAMS 
 
-# PARAMS 
 
+        m.Params.IntegralityFocus = 1 # focuses on integer solutions (do not change)
+        m.setParam('MIPGap', MIP_GAP) # finds a feasible solution within specified MIPGap of the optimal
+        if TIME_LIMIT > 0:
+            m.Params.TimeLimit = TIME_LIMIT
 
-m.Params.IntegralityFocus = 1 # focuses on integer solutions (do not change)
-m.setParam('MIPGap', 0) # finds a feasible solution within specified MIPGap of the optimal
+    print()
+    print(f"{bcolors.BOLD}{bcolors.OKCYAN}Setting up the model...{bcolors.ENDC}\n")
+    build_start = time.time()
+    report.phase("preprocess students")
 
-print()
-print(f"{bcolors.BOLD}{bcolors.OKCYAN}Setting up the model...{bcolors.ENDC}\n")
+    # Lab sections and the lecture sections they are linked to
+    # if a lab course, student in a lab section
+    # look at all bio classes prior and change the letters
+    bio_letters = ["D", "E", "G", "H", "I"]
+    lab_constraint = [] # all lab sections
+    labLinks = {} # lab title -> [lab sections, lecture sections]
+    for l in labs:
+        labSections = multiSection[l] if l in multiSection else [l]
+        lab_constraint.extend(labSections)
 
-# # Variables
-# # x_ij = 1 if student i is placed to class j.
+        found, title = findTitle(labs[l][:-1])
+        if not found: # bio -> have to add "a", "b", "e", "j", "n"
+            lectureSections = [findTitle(title + j)[1] for j in bio_letters]
+        elif title in multiSection:
+            lectureSections = multiSection[title]
+        else:
+            lectureSections = [title]
+        labLinks[l] = [labSections, lectureSections]
+
+    # Lunches: instead of a column for every lunch window, a student has one lunch column per day and lunch
+    # weight (the 2pm window weighs less), named after the first window of that weight; it stands for any
+    # free window of that weight and the actual window is picked after the solve
+    lunchTitles = set(j for day in "MTWRF" for j in multiSection["Lunch " + day])
+    lunchWindows = {} # id -> {first window -> windows of the day with its weight}
+    for i in id:
+        lunchWindows[i] = {}
+        for day in "MTWRF":
+            first = {} # weight -> first window
+            for j in multiSection["Lunch " + day]:
+                if priorities[i][j] > 0:
+                    first.setdefault(priorities[i][j], j)
+                    lunchWindows[i].setdefault(first[priorities[i][j]], []).append(j)
+
+    # Classes each student can be placed in: ranked classes (and their sections), lunch columns
+    # and the labs of ranked lecture sections. Variables are only created for these classes,
+    # so a student is never placed in something they did not choose.
+    studentClasses = {} # id -> [titles] in classTitles order
+    for i in id:
+        eligible = set(classArrays.titles[ranked(priorityMatrix, studentIndex[i])]) - lunchTitles
+        eligible.update(lunchWindows[i])
+        for l in labLinks:
+            if any(j in eligible for j in labLinks[l][1]):
+                eligible.update(labLinks[l][0])
+        studentClasses[i] = list(classArrays.titles[classArrays.indices(eligible)])
+
+    # Incremental run: schedules of the previous run that still fit are kept out of the model
+    previousSchedules = {} # id -> titles of the previous run
+    fixedSchedules = {} # id -> titles of the students left out of the model
+    openSeats = dict(seats) # seats left for the students in the model
+    if INCREMENTAL != "":
+        previousSchedules = {i: set(titles) for i, titles in load_solution(INCREMENTAL).items() if i in studentDict}
+        for i in previousSchedules:
+            titles = previousSchedules[i]
+            # classes still eligible and not overlapping (meeting times may have changed)
+            if all(j in studentClasses[i] or j in lunchTitles for j in titles) and conflictGraph.disjoint(titles):
+                fixedSchedules[i] = titles
+        forced = len(previousSchedules) - len(fixedSchedules)
+
+        # seats that were cut: the students who ranked the class lowest move
+        for j in classTitles:
+            holders = [i for i in fixedSchedules if j in fixedSchedules[i]]
+            if len(holders) > seats[j]:
+                for i in sorted(holders, key = lambda i: priorities[i][j])[:len(holders) - seats[j]]:
+                    del fixedSchedules[i]
+                    forced += 1
+
+        # full classes wanted by the students in the model: their holders who ranked them lowest may move
+        moving = [i for i in id if not i in fixedSchedules]
+        taken = Counter(j for i in fixedSchedules for j in fixedSchedules[i])
+        contested = set(j for i in moving for j in studentClasses[i] if taken[j] >= seats[j] and not "LUNCH" in j)
+        candidates = [i for i in fixedSchedules if len(fixedSchedules[i] & contested) > 0]
+        candidates.sort(key = lambda i: min(priorities[i][j] for j in fixedSchedules[i] & contested))
+        for i in candidates[:MOVE_LIMIT]:
+            del fixedSchedules[i]
+
+        for i in fixedSchedules:
+            for j in fixedSchedules[i]:
+                openSeats[j] -= 1
+        print(f"{bcolors.OKCYAN}Incremental run: {len(fixedSchedules)} schedules kept, {len(id) - len(previousSchedules)} new students, "
+              f"{len(previousSchedules) - len(fixedSchedules)} students may move ({forced} because their schedule no longer fits).{bcolors.ENDC}")
+
+    classStudents = {j: [] for j in classTitles} # title -> [ids] that can be placed in it (not fixed)
+    for i in id:
+        if i in fixedSchedules:
+            continue
+        for j in studentClasses[i]:
+            classStudents[j].append(i)
+
+    # Student types: students with the same eligible classes, priorities, departments (and previous schedule) are
+    # interchangeable in the model (representative id -> [ids of all students of that type])
+    studentTypes = {}
+    typeOf = {} # signature -> representative id
+    for i in id:
+        if i in fixedSchedules:
+            continue
+        signature = (tuple((j, priorities[i][j]) for j in studentClasses[i]),
+                     tuple(sorted((d, tuple(sorted(studentDepts[i][d]))) for d in studentDepts[i])),
+                     tuple(sorted(previousSchedules.get(i, ())))) # STAY_BONUS of the incremental run
+        if MODEL_ENGINE == "types" and signature in typeOf:
+            studentTypes[typeOf[signature]].append(i)
+        else:
+            typeOf[signature] = i
+            studentTypes[i] = [i]
 
-x = {}
-for i in id:
-    for j in classTitles:
-        x[i,j] = m.addVar(vtype = GRB.BINARY)
-m.update()
+    # students whose variables and constraints are built (only one student per type when aggregating)
+    modelStudents = list(studentTypes)
 
-# CONSTRAINTS
+    # # Variables
+    # # x_ij = 1 if student i is placed to class j (only for classes in studentClasses[i]).
+    # # pairs holds the (i, j) of each variable, column[i,j] its position (column of the constraint matrix)
 
-# 4 credits max
-for i in id:
-    m.addConstr(quicksum(x[i,j] * credit[j] for j in classTitles) <= 4.1, name = "credits")
-m.update()
+    pairs = [(i,j) for i in modelStudents for j in studentClasses[i]]
+    column = {pair: index for index, pair in enumerate(pairs)}
 
+    # the columns as arrays: row of the student in priorityMatrix and class index of each column
+    # (the columns of a student are consecutive, from firstColumn[i] on)
+    pairRow = np.fromiter((studentIndex[i] for (i,j) in pairs), dtype = np.int64, count = len(pairs))
+    pairClass = np.fromiter((classArrays.index[j] for (i,j) in pairs), dtype = np.int64, count = len(pairs))
+    firstColumn = {} # id -> first column of the student
+    first = 0
+    for i in modelStudents:
+        firstColumn[i] = first
+        first += len(studentClasses[i])
 
-# No more than two labs per student
-lab_constraint = []
+    # All columns of student i (numpy array)
+    def own_columns(i) -> np.ndarray:
+        return np.arange(firstColumn[i], firstColumn[i] + len(studentClasses[i]))
 
-for l in labs:
-    if l in multiSection:
-        for j in multiSection[l]:
-            lab_constraint.append(j)
-    else:
-        lab_constraint.append(l)
 
-for i in id:
-    m.addConstr(quicksum(x[i,l] for l in lab_constraint)  <= 2, name = "upper bound on labs")
-m.update()
+    # Columns of student i among the given titles
+    def student_columns(i, titles) -> list:
+        return [column[i,j] for j in titles if (i,j) in column]
 
 
-# No two sections from the same course
-for i in id:
-    for k in multiSection:
-        m.addConstr(quicksum(x[i,j] for j in multiSection[k]) <= 1, name = "multisections")
-m.update()
+    # CONSTRAINTS
+    report.phase("constraints")
+    # Each constraint family is recorded as rows and then added to the model by MODEL_ENGINE
+    # family -> [sense, rows], row = [columns, coefficients (None if all ones), rhs]
+    # [!] rows that cannot be violated (fewer variables than the right hand side) are skipped
+    constraints = {}
 
+    def add_row(family: str, sense: str, columns: list, rhs: float, coefficients: list = None):
+        if not family in constraints:
+            constraints[family] = [sense, []]
+        constraints[family][1].append([columns, coefficients, rhs])
 
-# Don't put student in something they did not choose
-for i in id:
-    for j in classTitles:
-        if (not j in labs) and (not j[:-2] in labs):
-            m.addConstr(x[i,j] <= priorities[i][j], name = "no_bad_choices")
-m.update()
 
+    # 4 credits max
+    for i in modelStudents:
+        columns = own_columns(i)
+        add_row("credits", "<", columns.tolist(), 4.1, classArrays.credit[pairClass[columns]].tolist())
 
-# enrollment cap
-for j in classTitles:
-    m.addConstr(quicksum(x[i,j] for i in id) <= seats[j], name = "cap")
-m.update()
 
+    # No more than two labs per student
+    for i in modelStudents:
+        columns = student_columns(i, lab_constraint)
+        if len(columns) > 2:
+            add_row("upper bound on labs", "<", columns, 2)
 
-# if a lab course, student in a lab section
-# look at all bio classes prior and change the letters
-bio_letters = ["D", "E", "G", "H", "I"]
-for i in id:
-    for l in labs:
-        found, title = findTitle(labs[l][:-1])
-        if not found: # bio -> have to add "a", "b", "e", "j", "n"
-            m.addConstr(quicksum(x[i,l1] for l1 in multiSection[l]) == quicksum(x[i, findTitle(title + j)[1]] 
-                        for j in bio_letters), name = "labs1")
-        elif l in multiSection:
-            if title in multiSection:
-                m.addConstr(quicksum(x[i,l1] for l1 in multiSection[l]) == quicksum(x[i, j] 
-                            for j in multiSection[title]), name = "labs2")
-            else:
-                m.addConstr(quicksum(x[i,l1] for l1 in multiSection[l]) == x[i, title], name = "labs3")
-        else:
-            if title in multiSection:
-                m.addConstr(x[i,l] == quicksum(x[i, j] 
-                            for j in multiSection[title]), name = "labs4")
-            else:
-                m.addConstr(x[i,l] == x[i, title], name = "labs5")
-m.update()
-
-
-# No more than one class per department: crosslisted -> look at students' preference and get department from there
-for i in id:
-    for d in studentDepts[i]:
-        m.addConstr(quicksum(x[i,j] for j in studentDepts[i][d]) <= 1, name = "departments")
-m.update()        
-
-
-# No more than 3 classes in a division
-for i in id:
-    for d in DIVISIONS:
-        divSections = []
-        for dept in DIVISIONS[d]:
-            if dept in studentDepts[i]:
-                for j in studentDepts[i][dept]:
-                    divSections.append(j)
-        m.addConstr(quicksum(x[i,j] for j in divSections) <= 3, name = "DIVISIONS")
-m.update()        
-
-
-# Writing intensive: one WI unless they have a language 
-for i in id:
-    m.addConstr(quicksum(x[i,j] * isWI[j] for j in classTitles) <= 1, name = "WI")
-m.update()
-
-# No more than 1 FYC course
-for i in id:
-    m.addConstr(quicksum(isFYC[j] * x[i,j] for j in classTitles) <= 1, name = "FYC")
-
-# Can only take one of math 152 + econ 100 + econ 166
-restrictedTitles = ["STAT ANALYSIS OF DATA", "INTRODUCTION TO ECONOMICS", "ECON THEORY & EVIDENCE"]
-restrictedSections = []
-
-for j in restrictedTitles:
-    if j in multiSection:
-        for section in multiSection[j]:
-            restrictedSections.append(section)
-    else:
-        restrictedSections.append(j)
 
-for i in id:
-    m.addConstr(quicksum(x[i,j] for j in restrictedSections) <= 1, name = "econ_fuss")
-m.update()
+    # No two sections from the same course
+    for i in modelStudents:
+        for k in multiSection:
+            columns = student_columns(i, multiSection[k])
+            if len(columns) > 1:
+                add_row("multisections", "<", columns, 1)
 
 
-# Overlapping times
-count = 0
-previous_count = count
-interval = 1  # interval in seconds
-start = time.time()
-next_time = start + interval
-for i in id:
-    count += 1
+    # enrollment cap (added with the schedule counts of each type when aggregating); lunches have no seat
+    # limits, a lunch column stands for every window of its weight
     for j in classTitles:
+        if not MODEL_ENGINE in SCHEDULE_ENGINES and not j in lunchTitles and len(classStudents[j]) > openSeats[j]:
+            add_row("cap", "<", [column[i,j] for i in classStudents[j]], openSeats[j])
+
+
+    # if a lab course, student in a lab section
+    for i in modelStudents:
+        for l in labLinks:
+            labColumns = student_columns(i, labLinks[l][0])
+            lectureColumns = student_columns(i, labLinks[l][1])
+            if len(labColumns) > 0 or len(lectureColumns) > 0:
+                add_row("labs", "=", labColumns + lectureColumns, 0, [1] * len(labColumns) + [-1] * len(lectureColumns))
+
+
+    # No more than one class per department: crosslisted -> look at students' preference and get department from there
+    for i in modelStudents:
+        for d in studentDepts[i]:
+            columns = student_columns(i, studentDepts[i][d])
+            if len(columns) > 1:
+                add_row("departments", "<", columns, 1)
+
+
+    # No more than DIVISION_LIMIT classes in a division
+    for i in modelStudents:
+        for d in DIVISIONS:
+            divSections = []
+            for dept in DIVISIONS[d]:
+                if dept in studentDepts[i]:
+                    for j in studentDepts[i][dept]:
+                        divSections.append(j)
+            columns = student_columns(i, divSections)
+            if len(columns) > DIVISION_LIMIT:
+                add_row("DIVISIONS", "<", columns, DIVISION_LIMIT)
+
+
+    # Writing intensive: one WI unless they have a language 
+    for i in modelStudents:
+        columns = own_columns(i)
+        columns = columns[classArrays.isWI[pairClass[columns]]].tolist()
+        if len(columns) > 1:
+            add_row("WI", "<", columns, 1)
+
+    # No more than 1 FYC course
+    for i in modelStudents:
+        columns = own_columns(i)
+        columns = columns[classArrays.isFYC[pairClass[columns]]].tolist()
+        if len(columns) > 1:
+            add_row("FYC", "<", columns, 1)
+
+    # Can only take one of math 152 + econ 100 + econ 166
+    restrictedTitles = ["STAT ANALYSIS OF DATA", "INTRODUCTION TO ECONOMICS", "ECON THEORY & EVIDENCE"]
+    restrictedSections = []
+
+    for j in restrictedTitles:
+        if j in multiSection:
+            for section in multiSection[j]:
+                restrictedSections.append(section)
+        else:
+            restrictedSections.append(j)
+
+    for i in modelStudents:
+        columns = student_columns(i, restrictedSections)
+        if len(columns) > 1:
+            add_row("econ_fuss", "<", columns, 1)
+
+
+    # Overlapping times
+    count = 0
+    interval = 1  # interval in seconds
+    start = time.time()
+    next_time = start + interval
+    if OVERLAP_FORMULATION in ["clique", "lazy"]:
+        cliques = conflictGraph.cliques(set(classTitles) - lunchTitles)
+    for i in modelStudents:
+        count += 1
         if time.time() >= next_time:
-            load_log(round(count / len(id) * 100))
+            load_log(round(count / len(modelStudents) * 100))
             next_time += interval
-        m.addConstr(quicksum(x[i,k] for k in find_overlapping_classes(classDict, j)) <= M - M * x[i,j], name = "overlap")
-m.update()
-
-
-print()
-
-# OBJECTIVE FUNCTION
-
-m.setObjective(quicksum(LOOKUP[priorities[i][j]] * x[i,j] * ceil(credit[j]) for i in id for j in classTitles), GRB.MAXIMIZE)
-
-m.update()
-m.optimize()
-
-
-# ------------------------------------------------------------------------------
-
-# RESULTS
-grand_total = 0
-no_first_choice = []
-not_four = {}
-top_priorities = [1,2,3,4]
-no_top_choices = []
-no_top2 = []
-no_lunch = {}
+        if OVERLAP_FORMULATION in ["clique", "lazy"]:
+            for clique in cliques:
+                columns = student_columns(i, clique)
+                if len(columns) > 1:
+                    add_row("overlap", "<", columns, 1)
+        else:
+            # sum of overlapping classes <= M - M * x[i,j]
+            for j in studentClasses[i]:
+                if j in lunchTitles:
+                    continue
+                columns = student_columns(i, conflictGraph.overlaps(j) - lunchTitles)
+                if len(columns) > 0:
+                    add_row("overlap", "<", columns + [column[i,j]], M, [1] * len(columns) + [M])
+
+
+    # Free lunch: a lunch column can only be taken if one of its windows is free, i.e. the student's classes
+    # block fewer windows than there are (each class counted once per window it overlaps)
+    # [!] exact as long as no window is blocked by two classes of a schedule (no class starts in the middle of a window)
+    for i in modelStudents:
+        classes = [j for j in studentClasses[i] if not j in lunchTitles]
+        for first, windows in lunchWindows[i].items():
+            blocked = [(j, sum(conflictGraph.conflict(j, w) for w in windows)) for j in classes]
+            blocked = [(j, count) for j, count in blocked if count > 0]
+            if 1 + sum(count for j, count in blocked) > len(windows):
+                add_row("lunch", "<", [column[i,first]] + [column[i,j] for j, count in blocked], len(windows),
+                        [1] + [count for j, count in blocked])
+
+
+    # OBJECTIVE FUNCTION
+    # LOOKUP of the ranking times the credits (rounded up), by distinct ranking
+    ranks, rankOf = np.unique(np.asarray(priorityMatrix[pairRow, pairClass]).ravel(), return_inverse = True)
+    weight = np.array([LOOKUP[rank] for rank in ranks])[rankOf] * np.ceil(classArrays.credit[pairClass])
+    if len(previousSchedules) > 0:
+        weight += STAY_BONUS * np.array([j in previousSchedules.get(i, ()) and not j in lunchTitles for (i,j) in pairs])
+    objective = weight.tolist()
+    # objective of the schedules kept by the incremental run (students left out of the model), weighed the same
+    fixedValue = float(sum(LOOKUP[priorities[i][j]] * np.ceil(classArrays.credit[classArrays.index[j]]) + (0 if j in lunchTitles else STAY_BONUS)
+                           for i in fixedSchedules for j in fixedSchedules[i]))
+
+
+    # PRESOLVE: decided students leave the model with their schedule, dominated columns are removed
+    decidedSchedules = {} # id -> titles of the students decided by the presolve (every student of their type)
+    decidedValue = 0
+    if PRESOLVE != "":
+        report.phase("presolve")
+        presolveColumns, presolveRows = len(pairs), sum(len(constraints[family][1]) for family in constraints)
+        lunchGroups = {i: [student_columns(i, multiSection["Lunch " + day]) for day in "MTWRF"] for i in modelStudents}
+        decided, dominated = presolve.presolve(pairs, constraints, objective, {i: len(studentTypes[i]) for i in modelStudents},
+                                               {j: openSeats[j] for j in classTitles if not j in lunchTitles},
+                                               {j: conflictGraph.masks[j] for j in classTitles if not j in lunchTitles}, lunchGroups)
+        fixed = {k: 0 for k in dominated}
+        for i in decided:
+            fixed.update({k: 0 for k in student_columns(i, studentClasses[i])})
+            fixed.update({k: 1 for k in decided[i]})
+            decidedValue += len(studentTypes[i]) * sum(objective[k] for k in decided[i])
+            for k in decided[i]:
+                openSeats[pairs[k][1]] -= len(studentTypes[i])
+            for member in studentTypes[i]:
+                decidedSchedules[member] = set(pairs[k][1] for k in decided[i])
+                for j in studentClasses[i]:
+                    classStudents[j].remove(member)
+            del studentTypes[i]
+        for k in dominated:
+            i, j = pairs[k]
+            if not i in decided:
+                studentClasses[i].remove(j)
+                for member in studentTypes[i]:
+                    classStudents[j].remove(member)
+
+        pairs, constraints, objective = presolve.fix_columns(pairs, constraints, objective, fixed)
+        column = {pair: index for index, pair in enumerate(pairs)}
+        modelStudents = list(studentTypes)
+        eliminatedRows = presolveRows - sum(len(constraints[family][1]) for family in constraints)
+        print(f"{bcolors.OKCYAN}Presolve: {len(decidedSchedules)} students decided, {len(dominated)} dominated classes dropped; "
+              f"{presolveColumns - len(pairs)} of {presolveColumns} columns and {eliminatedRows} of {presolveRows} rows eliminated.{bcolors.ENDC}")
+        report.values["presolve"] = {"students decided": len(decidedSchedules), "dominated columns": len(dominated),
+                                     "columns eliminated": presolveColumns - len(pairs), "columns left": len(pairs),
+                                     "rows eliminated": eliminatedRows, "rows left": presolveRows - eliminatedRows,
+                                     "decided value": decidedValue}
+
+
+    # Own rows of each model student (every family except the enrollment caps) and lunch columns per day,
+    # used by the schedule search (schedule engines, decomposition and heuristic)
+    studentRows = defaultdict(list) # id -> [sense, columns, coefficients, rhs]
+    for family in constraints:
+        if family != "cap":
+            sense, rows = constraints[family]
+            for columns, coefficients, rhs in rows:
+                studentRows[pairs[columns[0]][0]].append([sense, columns, coefficients, rhs])
+    studentLunches = {i: [student_columns(i, multiSection["Lunch " + day]) for day in "MTWRF"] for i in modelStudents}
+
+
+    # Schedule search input of a model student: [count, columns, lunchGroups, rows, objective, titles]
+    def subproblem(i) -> list:
+        columns = student_columns(i, studentClasses[i])
+        return [len(studentTypes[i]), columns, studentLunches[i], studentRows[i],
+                {k: objective[k] for k in columns}, {k: pairs[k][1] for k in columns}]
+
+
+    # the overlap rows are left to the solve as lazy constraints
+    lazyOverlap = OVERLAP_FORMULATION == "lazy" and MODEL_ENGINE in ["quicksum", "matrix"]
+
+    # the components of the decomposition are built and solved as models of their own (the two-stage solve goes first)
+    decomposed = DECOMPOSE != "" and TWO_STAGE == "" and MODEL_ENGINE in ["quicksum", "matrix"]
+
+    # variables of the engine: x[i,j] (quicksum, matrix) or z[rep,s] and the schedule rows (schedule engines)
+    x, z, capRows, typeRows, typeSchedules, pricing, limited = {}, {}, {}, {}, {}, [], set()
+    add_schedule = None # schedule engines: adds a schedule of a type to the model
+
+    # Add variables, constraints and objective to the model
+    report.phase("model")
+    if HEURISTIC == "only":
+        pass # preview: the model is not built
+    elif decomposed:
+        pass # no full model: see the decomposition in solve
+    elif MODEL_ENGINE == "matrix":
+        # every family as one sparse coefficient matrix over all variables
+        X = m.addMVar(len(pairs), vtype = GRB.BINARY)
+        for family in constraints:
+            if family == "overlap" and lazyOverlap:
+                continue
+            sense, rows = constraints[family]
+            rowIndex, colIndex, values = [], [], []
+            for r, (columns, coefficients, rhs) in enumerate(rows):
+                rowIndex.extend([r] * len(columns))
+                colIndex.extend(columns)
+                values.extend(coefficients if coefficients is not None else [1] * len(columns))
+            A = csr_matrix((values, (rowIndex, colIndex)), shape = (len(rows), len(pairs)))
+            m.addMConstr(A, X, sense, np.array([row[2] for row in rows], dtype = float), name = family)
+        m.setObjective(np.array(objective) @ X, GRB.MAXIMIZE)
+        x = dict(zip(pairs, X.tolist()))
+    elif MODEL_ENGINE == "cpsat":
+        # every family as CP-SAT constraints, except the overlap rows: the meeting times of each student's
+        # classes are intervals that may not overlap
+        x = dict(zip(pairs, m.add_columns(len(pairs))))
+        for family in constraints:
+            if family != "overlap":
+                m.add_rows(family, *constraints[family])
+        for i in modelStudents:
+            m.add_no_overlap("no overlap", [(column[i,j], conflictGraph.intervals[j]) for j in studentClasses[i] if not j in lunchTitles],
+                             conflictGraph.dayIndex)
+        m.set_objective(objective)
+    elif MODEL_ENGINE in SCHEDULE_ENGINES:
+        # one integer variable per (student type, feasible schedule of the type) counting how many
+        # students of the type get that schedule; enrollment caps are the only rows shared by types
+        # (with the "schedules" engine every student is its own type)
+        # titles whose seats could run out; a schedule is only kept if no other schedule of the type
+        # is at least as good while using a subset of these titles
+        # [!] lunches are left out and spread over equally good lunch windows after the solve
+        lunchTitles = set(j for day in "MTWRF" for j in multiSection["Lunch " + day])
+        limited = set(j for j in classTitles if len(classStudents[j]) > openSeats[j] and not j in lunchTitles)
+        capRows = {}
+        for j in limited:
+            capRows[j] = m.addConstr(LinExpr() <= openSeats[j], name = "cap")
+
+        typeRows = {} # representative id -> row fixing the number of students of the type
+        typeSchedules = {} # representative id -> [(value, titles)]
+        z = {}
+        pricing = [] # types with too many schedules to enumerate, their schedules are generated by column generation
+
+        # Adds a schedule of the type to the model
+        def add_type_schedule(rep, value: float, titles: list, vtype: str = GRB.INTEGER):
+            s = len(typeSchedules[rep])
+            typeSchedules[rep].append((value, titles))
+            rows = [typeRows[rep]] + [capRows[j] for j in titles if j in limited]
+            z[rep,s] = m.addVar(vtype = vtype, ub = len(studentTypes[rep]), obj = value, column = Column([1] * len(rows), rows))
+        add_schedule = add_type_schedule
+
+        for rep in modelStudents:
+            typeRows[rep] = m.addConstr(LinExpr() == len(studentTypes[rep]), name = "types")
+            typeSchedules[rep] = []
+            repColumns = student_columns(rep, studentClasses[rep])
+
+            schedules = None
+            if MODEL_ENGINE != "lagrangian":
+                schedules = enumerate_schedules(repColumns, studentLunches[rep], studentRows[rep], objective, limit = SCHEDULE_LIMIT)
+            if schedules is None:
+                # start from the schedule without classes and the best schedule ignoring seats
+                pricing.append(rep)
+                lunchColumns = [c for group in studentLunches[rep] for c in group]
+                schedules = [best_schedule(lunchColumns, studentLunches[rep], studentRows[rep], objective),
+                             best_schedule(repColumns, studentLunches[rep], studentRows[rep], objective)]
+
+            schedules = [(value, [pairs[k][1] for k in columns]) for value, columns in schedules]
+            for value, titles in remove_dominated(schedules, limited):
+                add_schedule(rep, value, titles)
+        m.ModelSense = GRB.MAXIMIZE
+    else:
+        x = {}
+        for pair in pairs:
+            x[pair] = m.addVar(vtype = GRB.BINARY)
+        for family in constraints:
+            if family == "overlap" and lazyOverlap:
+                continue
+            sense, rows = constraints[family]
+            for columns, coefficients, rhs in rows:
+                if coefficients is None:
+                    lhs = quicksum(x[pairs[k]] for k in columns)
+                else:
+                    lhs = quicksum(coefficient * x[pairs[k]] for k, coefficient in zip(columns, coefficients))
+                if sense == "=":
+                    m.addConstr(lhs == rhs, name = family)
+                else:
+                    m.addConstr(lhs <= rhs, name = family)
+        m.setObjective(quicksum(objective[k] * x[pair] for k, pair in enumerate(pairs)), GRB.MAXIMIZE)
+
+
+    print()
+
+    m.update()
+    build_time = time.time() - build_start
+    print(f"{bcolors.OKCYAN}Model built in {build_time:.2f} seconds ({MODEL_ENGINE} engine, {OVERLAP_FORMULATION} overlap formulation).{bcolors.ENDC}")
+
+    return SimpleNamespace(m = m, x = x, z = z, build_time = build_time, pairs = pairs, column = column, constraints = constraints,
+                           objective = objective, studentClasses = studentClasses, classStudents = classStudents, lab_constraint = lab_constraint,
+                           labLinks = labLinks, studentTypes = studentTypes, modelStudents = modelStudents, studentRows = studentRows,
+                           studentLunches = studentLunches, previousSchedules = previousSchedules, fixedSchedules = fixedSchedules,
+                           openSeats = openSeats, capRows = capRows, typeRows = typeRows, typeSchedules = typeSchedules, pricing = pricing,
+                           limited = limited, student_columns = student_columns, subproblem = subproblem, add_schedule = add_schedule,
+                           decidedSchedules = decidedSchedules, decidedValue = decidedValue, fixedValue = fixedValue,
+                           lazyOverlap = lazyOverlap, decomposed = decomposed)
+
+
+# Finds the starting solution and solves the model (only the heuristic with HEURISTIC = "only")
+# Returns the schedule of each student (assigned: id -> titles) and its value
+def solve(catalog: SimpleNamespace, students: SimpleNamespace, model: SimpleNamespace, report: RunReport = None) -> SimpleNamespace:
+    report = report or RunReport()
+    classTitles, conflictGraph, multiSection = catalog.classTitles, catalog.conflictGraph, catalog.multiSection
+    id, priorities = students.id, students.priorities
+    (m, x, z, pairs, column, constraints, objective, studentClasses, classStudents, studentTypes, modelStudents, studentRows,
+     studentLunches, previousSchedules, fixedSchedules, openSeats, capRows, typeRows, typeSchedules, pricing, limited) = (
+        model.m, model.x, model.z, model.pairs, model.column, model.constraints, model.objective, model.studentClasses,
+        model.classStudents, model.studentTypes, model.modelStudents, model.studentRows, model.studentLunches,
+        model.previousSchedules, model.fixedSchedules, model.openSeats, model.capRows, model.typeRows, model.typeSchedules,
+        model.pricing, model.limited)
+    student_columns, subproblem, add_schedule = model.student_columns, model.subproblem, model.add_schedule
+    outsideValue = model.decidedValue + model.fixedValue # objective of the students decided by the presolve or kept by INCREMENTAL
+
+    report.phase("starting solution")
+
+    # titles whose seats could run out (lunches have no seat limits)
+    lunchTitles = set(j for day in "MTWRF" for j in multiSection["Lunch " + day])
+    limitedSeats = {j: openSeats[j] for j in classTitles if len(classStudents[j]) > openSeats[j] and not j in lunchTitles}
+
+    # Heuristic assignment: quick preview of the schedules, or starting solution of the model
+    heuristicSchedules = {} # id -> titles of the heuristic schedule
+    if HEURISTIC in ["start", "only"]:
+        heuristic_start = time.time()
+        heuristic_value, heuristicColumns = heuristic.assign({i: subproblem(i) for i in modelStudents}, limitedSeats,
+                                                             rounds = HEURISTIC_ROUNDS)
+        for rep in modelStudents:
+            for member, columns in zip(studentTypes[rep], heuristicColumns[rep]):
+                heuristicSchedules[member] = [pairs[k][1] for k in columns]
+        print(f"{bcolors.OKCYAN}Heuristic assignment worth {heuristic_value:.2f} in {time.time() - heuristic_start:.2f} seconds.{bcolors.ENDC}")
+
+    # Starting solution: schedules of a previous run (WARM_START) first, then the heuristic schedules.
+    # Classes, sections and seats may have changed since, so every student gets the best schedule
+    # among their starting titles that are still eligible and have seats left (lunches may move).
+    startSchedules = {} # id -> titles of the starting schedule
+    startSources = []
+    if WARM_START != "":
+        startSources.append(load_solution(WARM_START))
+    if INCREMENTAL != "":
+        startSources.append(previousSchedules)
+    if HEURISTIC == "start":
+        startSources.append(heuristicSchedules)
+
+    representative = {i: rep for rep in modelStudents for i in studentTypes[rep]}
+    left = dict(limitedSeats)
+    cut = 0
+    for source in startSources:
+        for i in source:
+            if not i in representative or i in startSchedules:
+                continue
+            rep = representative[i]
+            wanted = set(source[i])
+            columns = [k for k in student_columns(rep, studentClasses[rep])
+                       if (pairs[k][1] in wanted or pairs[k][1] in lunchTitles) and left.get(pairs[k][1], 1) > 0]
+            lunchGroups = [[k for k in group if k in columns] for group in studentLunches[rep]]
+            value, scheduleColumns = best_schedule(columns, lunchGroups, studentRows[rep], objective)
+            startSchedules[i] = [pairs[k][1] for k in scheduleColumns]
+            for j in startSchedules[i]:
+                if j in left:
+                    left[j] -= 1
+            if len(wanted - lunchTitles - set(startSchedules[i])) > 0:
+                cut += 1
+    if len(startSources) > 0:
+        print(f"{bcolors.OKCYAN}Starting solution for {len(startSchedules)} students ({cut} schedules cut down to stay feasible).{bcolors.ENDC}")
+
+    # the schedule engines need the starting schedules among their schedules
+    startCounts = defaultdict(int) # (representative id, schedule) -> students
+    if HEURISTIC != "only" and MODEL_ENGINE in SCHEDULE_ENGINES:
+        for i in startSchedules:
+            rep = representative[i]
+            titles = startSchedules[i]
+            known = [s for s, schedule in enumerate(typeSchedules[rep]) if set(schedule[1]) == set(titles)]
+            if len(known) == 0:
+                add_schedule(rep, sum(objective[column[rep,j]] for j in titles), titles)
+                known = [len(typeSchedules[rep]) - 1]
+            startCounts[rep, known[0]] += 1
+
+    # Schedules of the model students (id -> titles) in a solution (variable -> value)
+    def schedules_of(values: dict) -> dict:
+        if MODEL_ENGINE in SCHEDULE_ENGINES:
+            # hand out the schedules of each type to its students
+            schedules = {}
+            for rep in modelStudents:
+                members = iter(studentTypes[rep])
+                for s, (value, titles) in enumerate(typeSchedules[rep]):
+                    for _ in range(round(values[rep,s])):
+                        schedules[next(members)] = set(titles)
+            return schedules
+        return {i: set(j for j in studentClasses[i] if values[i,j] > .7) for i in modelStudents}
+
+
+    # STAY_BONUS in the objective of the schedules (id -> titles): classes kept from the previous run
+    def stay_bonus(schedules: dict) -> float:
+        return STAY_BONUS * sum(1 for i in schedules for j in schedules[i] if j in previousSchedules.get(i, ()) and not j in lunchTitles)
+
+
+    # a lunch column stands for every window of its weight that day: each student gets the least taken
+    # free window (lunches have no seat limits)
+    def place_lunches(schedules: dict):
+        lunchTaken = Counter(j for i in fixedSchedules for j in fixedSchedules[i])
+        for i in schedules:
+            for day in "MTWRF":
+                lunch = [j for j in schedules[i] if j in multiSection["Lunch " + day]]
+                if len(lunch) == 0:
+                    continue
+                busy = conflictGraph.mask(j for j in schedules[i] if j != lunch[0])
+                free = [j for j in multiSection["Lunch " + day] if priorities[i][j] == priorities[i][lunch[0]] and conflictGraph.fits(j, busy)]
+                best = min(free, key = lambda j: lunchTaken[j])
+                schedules[i].remove(lunch[0])
+                schedules[i].add(best)
+                lunchTaken[best] += 1
+
+    report.phase("solve")
+    if HEURISTIC == "only":
+        pass # preview: the model is not solved
+    elif MODEL_ENGINE == "lagrangian":
+        # seat prices by subgradient steps, students priced in parallel; every schedule found goes to the
+        # model, which is then solved over these schedules (repair/polish)
+        print(f"{bcolors.OKCYAN}Lagrangian decomposition over {len(modelStudents)} students/types...{bcolors.ENDC}")
+        subproblems = {rep: subproblem(rep) for rep in modelStudents}
+        pools = {rep: list(typeSchedules[rep]) for rep in modelStudents}
+        lagrangian_bound, lagrangian_value, lagrangian_history = lagrangian.solve(subproblems, {j: openSeats[j] for j in limited}, pools,
+                                                                          iterations = LAGRANGIAN_ITERATIONS, processes = PROCESSES)
+        for rep in modelStudents:
+            for value, titles in pools[rep][len(typeSchedules[rep]):]:
+                add_schedule(rep, value, titles)
+
+    # Column generation: solve the LP relaxation, then add the schedules with positive reduced value
+    # (value - seat prices of its titles - price of the type) until there are none
+    elif MODEL_ENGINE in SCHEDULE_ENGINES and len(pricing) > 0:
+        print(f"{bcolors.OKCYAN}Generating schedules for {len(pricing)} students/types by column generation...{bcolors.ENDC}")
+        for var in m.getVars():
+            var.VType = GRB.CONTINUOUS
+        m.Params.OutputFlag = 0
+        iteration = 0
+        while True:
+            iteration += 1
+            m.optimize()
+            added = 0
+            for rep in pricing:
+                reduced = {}
+                for k in student_columns(rep, studentClasses[rep]):
+                    j = pairs[k][1]
+                    reduced[k] = objective[k] - (capRows[j].Pi if j in limited else 0)
+                value, columns = best_schedule(list(reduced), studentLunches[rep], studentRows[rep], reduced)
+                if value - typeRows[rep].Pi > 1e-6:
+                    titles = [pairs[k][1] for k in columns]
+                    add_schedule(rep, sum(objective[k] for k in columns), titles, GRB.CONTINUOUS)
+                    added += 1
+            print(f"Iteration {iteration}: LP bound {m.ObjVal:.2f}, added {added} schedules")
+            if added == 0:
+                break
+        lp_bound = m.ObjVal
+        for var in m.getVars():
+            var.VType = GRB.INTEGER
+        m.Params.OutputFlag = 1
+
+    # Two-stage: courses first (stage 1), then the model below is restricted to their sections (stage 2)
+    elif TWO_STAGE != "" and not MODEL_ENGINE in SCHEDULE_ENGINES:
+        print(f"{bcolors.OKCYAN}Stage 1: courses of {len(modelStudents)} students...{bcolors.ENDC}")
+        lunchTitles = set(j for day in "MTWRF" for j in multiSection["Lunch " + day])
+        courseOf = {j: k for k in multiSection for j in multiSection[k] if not j in lunchTitles}
+        courseOf.update({j: j for j in classTitles if not j in courseOf and not j in lunchTitles})
+        stage1_start = time.time()
+        studentCourses, stage1_value, stage1_cuts = two_stage.solve_courses(pairs, constraints, objective, courseOf, openSeats, studentRows)
+        stage1_time = time.time() - stage1_start
+        # the one-stage optimum is at most stage 1 plus the best lunches
+        stage1_bound = stage1_value + sum(max(objective[k] for k in group) for i in modelStudents for group in studentLunches[i] if len(group) > 0)
+        for (i,j) in pairs:
+            if j in courseOf and not courseOf[j] in studentCourses[i]:
+                x[i,j].UB = 0
+        print(f"{bcolors.OKCYAN}Stage 2: sections of the {sum(len(studentCourses[i]) for i in studentCourses)} courses chosen...{bcolors.ENDC}")
+
+    # Decomposition: the components are solved in parallel, their schedules and values make up the solution
+    # (no full model is built)
+    elif model.decomposed:
+        decompose_start = time.time()
+        componentList = components.find_components({i: studentClasses[i] for i in modelStudents}, set(limitedSeats))
+        componentOf = {i: k for k, component in enumerate(componentList) for i in component}
+        componentCaps = defaultdict(list) # component -> its enrollment cap rows
+        for columns, coefficients, rhs in constraints.get("cap", ["<", []])[1]:
+            componentCaps[componentOf[pairs[columns[0]][0]]].append(["<", columns, coefficients, rhs])
+
+        chosen = set() # columns of the schedules
+        tasks = []
+        taskStudents = [] # students of each task
+        for k, component in enumerate(componentList):
+            if len(componentCaps[k]) == 0:
+                # no seat can run out: every student takes their best schedule
+                for i in component:
+                    chosen.update(best_schedule(*subproblem(i)[1:5])[1])
+            else:
+                tasks.append(([c for i in component for c in student_columns(i, studentClasses[i])],
+                              [row for i in component for row in studentRows[i]] + componentCaps[k]))
+                taskStudents.append(len(component))
+        print(f"{bcolors.OKCYAN}{len(componentList)} independent components: {len(tasks)} with seat limits "
+              f"(largest {max(taskStudents + [0])} students) solved in parallel, "
+              f"{len(componentList) - len(tasks)} students on their own.{bcolors.ENDC}")
+        results = components.solve(tasks, objective, PROCESSES, TIME_LIMIT, MIP_GAP)
+        if any(value is None for status, value, bound, columns in results):
+            sys.exit(f"{bcolors.FAIL}No schedules found for a component (status {[r[0] for r in results if r[1] is None][0]}).{bcolors.ENDC}")
+        for status, value, bound, columns in results:
+            chosen.update(columns)
+        decomposed_value = sum(objective[k] for k in chosen)
+        decomposed_bound = decomposed_value + sum(bound - value for status, value, bound, columns in results)
+        if any(status == GRB.TIME_LIMIT for status, value, bound, columns in results):
+            print(f"{bcolors.WARNING}Stopped by the time limit ({TIME_LIMIT:g} seconds): objective {outsideValue + decomposed_value:.2f}, "
+                  f"bound {outsideValue + decomposed_bound:.2f}.{bcolors.ENDC}")
+        for family in constraints:
+            report.family(family, len(constraints[family][1]), sum(len(row[0]) for row in constraints[family][1]))
+        report.values["decomposition"] = {"components": len(componentList), "models": len(tasks),
+                                          "largest model students": max(taskStudents + [0]), "time": time.time() - decompose_start,
+                                          "objective": decomposed_value, "bound": decomposed_bound}
+
+    # MIP start (partial if some students have no starting schedule)
+    if HEURISTIC != "only" and not model.decomposed and len(startSchedules) > 0:
+        if MODEL_ENGINE in SCHEDULE_ENGINES:
+            for rep in modelStudents:
+                complete = all(i in startSchedules for i in studentTypes[rep])
+                for s in range(len(typeSchedules[rep])):
+                    if complete or startCounts[rep,s] > 0:
+                        z[rep,s].Start = startCounts[rep,s]
+        else:
+            for i in startSchedules:
+                for j in studentClasses[i]:
+                    x[i,j].Start = 1 if j in startSchedules[i] else 0
+
+    if HEURISTIC != "only" and not model.decomposed:
+        # rows and nonzeros of each constraint family in the model
+        m.update()
+        if MODEL_ENGINE in SCHEDULE_ENGINES:
+            for family, rows in [("cap", capRows.values()), ("types", typeRows.values())]:
+                report.family(family, len(rows), sum(m.getRow(row).size() for row in rows))
+        elif MODEL_ENGINE == "cpsat":
+            for family, (rows, nonzeros) in m.families.items():
+                report.family(family, rows, nonzeros)
+        else:
+            for family in constraints:
+                if not (family == "overlap" and model.lazyOverlap):
+                    report.family(family, len(constraints[family][1]), sum(len(row[0]) for row in constraints[family][1]))
+
+        # Gurobi callback: presolve statistics (report), lazy overlap rows and checkpoints of the new solutions
+        keys = list(z) if MODEL_ENGINE in SCHEDULE_ENGINES else pairs # variable of each solution value
+        variables = [z[key] for key in keys] if MODEL_ENGINE in SCHEDULE_ENGINES else [x[pair] for pair in pairs]
+        overlapRows = constraints.get("overlap", ["<", []])[1]
+        cutRows = [] # overlap row of each lazy cut
+        checked = 0
+        checkpoints, checkpointValue, checkpointSchedules = 0, None, None
+
+        # Writes the schedules of a new solution (variable -> value) to CHECKPOINT_FILE if it is better
+        # (no bound is saved while the solver has none, GRB.INFINITY)
+        def checkpoint(values: dict, value: float, bound: float):
+            nonlocal checkpoints, checkpointValue, checkpointSchedules
+            if checkpointValue is not None and value <= checkpointValue + 1e-9:
+                return
+            schedules = schedules_of(values)
+            schedules.update({i: set(titles) for i, titles in model.decidedSchedules.items()})
+            place_lunches(schedules)
+            schedules.update(fixedSchedules)
+            save_solution(CHECKPOINT_FILE, schedules, outsideValue + value, outsideValue + bound if bound < GRB.INFINITY else None,
+                          stay_bonus(schedules))
+            checkpoints, checkpointValue, checkpointSchedules = checkpoints + 1, value, schedules
+
+        def solve_callback(cbModel, where):
+            nonlocal checked
+            report.callback(cbModel, where)
+            if where != GRB.Callback.MIPSOL:
+                return
+            values = cbModel.cbGetSolution(variables)
+            if model.lazyOverlap:
+                # the solution is checked against the overlap rows, the violated ones are added as lazy constraints
+                checked += 1
+                violated = [r for r, (columns, coefficients, rhs) in enumerate(overlapRows) if sum(values[k] for k in columns) > rhs + 1e-6]
+                for r in violated:
+                    cbModel.cbLazy(quicksum(variables[k] for k in overlapRows[r][0]) <= overlapRows[r][2])
+                cutRows.extend(violated)
+                if len(violated) > 0:
+                    return # the solution is cut off
+            if CHECKPOINT_FILE != "":
+                checkpoint(dict(zip(keys, values)), cbModel.cbGet(GRB.Callback.MIPSOL_OBJ), cbModel.cbGet(GRB.Callback.MIPSOL_OBJBND))
+
+        if model.lazyOverlap:
+            m.Params.LazyConstraints = 1
+        if MODEL_ENGINE == "cpsat":
+            m.optimize(incumbent = (lambda values, value, bound: checkpoint(dict(zip(keys, values)), value, bound))
+                                   if CHECKPOINT_FILE != "" else None)
+        else:
+            m.optimize(solve_callback)
+        report.record_solve(m)
+        if m.SolCount == 0:
+            sys.exit(f"{bcolors.FAIL}No schedules found (status {m.Status}).{bcolors.ENDC}")
+        if m.Status == GRB.TIME_LIMIT:
+            print(f"{bcolors.WARNING}Stopped by the time limit ({TIME_LIMIT:g} seconds): objective {outsideValue + m.ObjVal:.2f}, "
+                  f"bound {outsideValue + m.ObjBound:.2f} (gap {m.MIPGap * 100:.2f}%).{bcolors.ENDC}")
+        if CHECKPOINT_FILE != "":
+            # the last checkpoint holds the bound known when it was found: the final bound replaces it
+            if checkpointSchedules is not None and abs(checkpointValue - m.ObjVal) < 1e-6 and m.ObjBound < GRB.INFINITY:
+                save_solution(CHECKPOINT_FILE, checkpointSchedules, outsideValue + checkpointValue, outsideValue + m.ObjBound,
+                              stay_bonus(checkpointSchedules))
+            report.values["checkpoints"] = checkpoints
+            print(f"{bcolors.OKCYAN}{checkpoints} improved solutions written to {CHECKPOINT_FILE}.{bcolors.ENDC}")
+
+        if model.lazyOverlap:
+            cut = set(cutRows)
+            report.family("overlap", len(cut), sum(len(overlapRows[r][0]) for r in cut))
+            report.values["lazy overlap"] = {"overlap rows": len(overlapRows), "cuts": len(cutRows), "rows cut": len(cut),
+                                             "solutions checked": checked}
+            print(f"{bcolors.OKCYAN}Lazy overlap constraints: {len(cut)} of the {len(overlapRows)} overlap rows were needed "
+                  f"({len(cutRows)} cuts over {checked} solutions).{bcolors.ENDC}")
+
+        if MODEL_ENGINE == "lagrangian":
+            print(f"{bcolors.OKCYAN}Lagrangian bound {lagrangian_bound:.2f}, repaired {lagrangian_value:.2f}, polished {m.ObjVal:.2f} (gap {(lagrangian_bound - m.ObjVal) / max(abs(lagrangian_bound), 1e-9) * 100:.2f}%).{bcolors.ENDC}")
+        elif MODEL_ENGINE in SCHEDULE_ENGINES and len(pricing) > 0:
+            print(f"{bcolors.OKCYAN}Column generation LP bound {lp_bound:.2f}, best schedule choice {m.ObjVal:.2f}.{bcolors.ENDC}")
+
+    # Schedule of each student (id -> titles)
+    if HEURISTIC == "only":
+        assigned = {i: set(heuristicSchedules[i]) for i in heuristicSchedules}
+    elif model.decomposed:
+        assigned = schedules_of({pair: 1 if k in chosen else 0 for k, pair in enumerate(pairs)})
+    elif MODEL_ENGINE in SCHEDULE_ENGINES:
+        assigned = schedules_of({key: z[key].x for key in z})
+    else:
+        assigned = schedules_of({pair: x[pair].x for pair in pairs})
+
+    # students decided by the presolve
+    assigned.update({i: set(titles) for i, titles in model.decidedSchedules.items()})
+    place_lunches(assigned)
+
+    if TWO_STAGE != "" and HEURISTIC != "only" and not MODEL_ENGINE in SCHEDULE_ENGINES:
+        sections = {k: multiSection[k] for k in multiSection if not k.startswith("Lunch ")}
+        # only the model students move: openSeats are the seats left once the students decided by the presolve
+        # took theirs, so they are not counted again (the schedules are shared with assigned)
+        modelSchedules = {i: assigned[i] for i in assigned if not i in model.decidedSchedules}
+        moves = two_stage.balance_sections(modelSchedules, sections, openSeats, {pair: objective[k] for k, pair in enumerate(pairs)}, conflictGraph)
+        loss = stage1_bound - m.ObjVal
+        print(f"{bcolors.OKCYAN}Two-stage: stage 1 bound {stage1_bound:.2f} ({stage1_time:.2f} seconds, {stage1_cuts} course sets cut off), "
+              f"stage 2 {m.ObjVal:.2f}: quality loss at most {loss:.2f} ({loss / max(abs(stage1_bound), 1e-9) * 100:.2f}%) "
+              f"vs the one-stage model; {moves} students moved to balance sections.{bcolors.ENDC}")
+        report.values["two stage"] = {"stage 1 bound": stage1_bound, "stage 1 time": stage1_time, "course sets cut off": stage1_cuts,
+                                      "stage 2 objective": m.ObjVal, "quality loss bound": loss, "balancing moves": moves}
+    assigned.update(fixedSchedules) # incremental run: students left out of the model keep their schedules
+    print(f"{bcolors.OKCYAN}{len(id) - len(fixedSchedules)} students solved as {len(modelStudents)} model students"
+          f" ({len(model.decidedSchedules)} decided by the presolve).{bcolors.ENDC}")
+
+    if HEURISTIC == "only":
+        solution_value = heuristic_value
+    elif model.decomposed:
+        solution_value = decomposed_value
+    else:
+        solution_value = m.ObjVal
+    return SimpleNamespace(assigned = assigned, value = outsideValue + solution_value, stayBonus = stay_bonus(assigned),
+                           startSchedules = startSchedules, heuristicSchedules = heuristicSchedules)
+
+
+# Writes the schedules (solution.json, schedules.txt, result.xlsx) and the statistics of the run (results.txt)
+def export(catalog: SimpleNamespace, students: SimpleNamespace, model: SimpleNamespace, solution: SimpleNamespace,
+           report: RunReport = None):
+    report = report or RunReport()
+    (courseDept, courseNum, courseName, courseSection, courseType, credit, crossListed, meetingInfo, meetings,
+     multiSection) = (catalog.courseDept, catalog.courseNum, catalog.courseName, catalog.courseSection, catalog.courseType,
+                      catalog.credit, catalog.crossListed, catalog.meetingInfo, catalog.meetings, catalog.multiSection)
+    seats = dict(catalog.seats) # counted down to the empty seats
+    (id, priorities, placements, title_to_courseName, name, email, majorInterest, stuType, grad, no_priorities,
+     studentsWrongPlacement) = (students.id, students.priorities, students.placements, students.title_to_courseName,
+                                students.name, students.email, students.majorInterest, students.stuType, students.grad,
+                                students.no_priorities, students.studentsWrongPlacement)
+    classArrays, lab_constraint = catalog.classArrays, model.lab_constraint
+    assigned = solution.assigned
+
+    report.phase("export")
+
+    # machine-readable schedules for the next run (WARM_START)
+    save_solution(SOLUTION_FILE, assigned, solution.value, stayBonus = solution.stayBonus)
+
+
+    # ------------------------------------------------------------------------------
+
+    # RESULTS
+    grand_total = 0
+    no_first_choice = []
+    not_four = {}
+    top_priorities = [1,2,3,4]
+    no_top_choices = []
+    no_top2 = []
+    no_lunch = {}
+
+
+    # Record each student's schedule in 'schedules.txt'
+    with ExcelWriter('result.xlsx', engine='xlsxwriter') as writer:
+        with open("schedules.txt", "w") as f:
+            f.write("""[!] Note that original course names may be different from titles due to placement overtaking precedence
+                Original course name is whatever the student put down on the preference sheet\n\n""")
+            studentID = [] #
+            start = [] #
+            year = [] #
+            studentName = [] #
+            studentEmail = [] #
+            stuType_out = [] #
+            major = [] #
+            graduateEd = [] #
+            placements_out = [] #
+            sectionName = [] #
+            courseTitle = [] #
+            courseType_out = [] #
+            meetingInfo_out = [] #
+            choice = [] #
+
+            for i in id:
+                first_choice = False
+                second_choice = True
+                credits = 0
+                count_top_choice = 0
+                total = 0
+                total_lunches = 0
+
+                f.write("PLACEMENTS info for {}:\n".format(name[i]))
+
+                placement_string = ""
+                for p in placements[i]:
+                    placement_string += p[1]
+                    if p[0] == True:
+                        found = ""
+                        placement_string += " (" + courseName[p[1]] + ") |"
+                    else:
+                        placement_string += " (Not found) | "
+                        found = " (Not found)"
+                        if i in studentsWrongPlacement:
+                            for wrongplacement in studentsWrongPlacement[i]:
+                                if wrongplacement[0] == p[1]:
+                                    found = " (Not found | ignored {} as choice {}) ".format(wrongplacement[2], wrongplacement[1]) 
 
+                    f.write(found + " " + p[1] + "\n")
 
-# Record each student's schedule in 'schedules.txt'
-with ExcelWriter('result.xlsx', engine='xlsxwriter') as writer:
-    with open("schedules.txt", "w") as f:
-        f.write("""[!] Note that original course names may be different from titles due to placement overtaking precedence
-                Original course name is whatever the student put down on the preference sheet\n\n""")
-        studentID = [] #
-        start = [] #
-        year = [] #
-        studentName = [] #
-        studentEmail = [] #
-        stuType_out = [] #
-        major = [] #
-        graduateEd = [] #
-        placements_out = [] #
-        sectionName = [] #
-        courseTitle = [] #
-        courseType_out = [] #
-        meetingInfo_out = [] #
-        choice = [] #
-        
-        for i in id:
-            first_choice = False
-            second_choice = True
-            credits = 0
-            count_top_choice = 0
-            total = 0
-            total_lunches = 0
-
-            f.write("PLACEMENTS info for {}:\n".format(name[i]))
-
-            placement_string = ""
-            for p in placements[i]:
-                placement_string += p[1]
-                if p[0] == True:
-                    found = ""
-                    placement_string += " (" + courseName[p[1]] + ") |"
-                else:
-                    placement_string += " (Not found) | "
-                    found = " (Not found)"
-                    if i in studentsWrongPlacement:
-                        for wrongplacement in studentsWrongPlacement[i]:
-                            if wrongplacement[0] == placement:
-                                found = " (Not found | ignored {} as choice {}) ".format(wrongplacement[2], wrongplacement[1]) 
-
-                f.write(found + " " + p[1] + "\n")
-            
-            f.write("{} {} ({}) got:\n".format(name[i], i, email[i]))
+                f.write("{} {} ({}) got:\n".format(name[i], i, email[i]))
 
-            for j in classTitles:
-                if x[i,j].x > .7: # x[i,j] = 1
+                for j in classArrays.titles[classArrays.indices(assigned[i])]:
                     priority = 0
                     record = True
 
@@ -1003,7 +1876,7 @@ with ExcelWriter('result.xlsx', engine='xlsxwriter') as writer:
                         credits += credit[j]
 
                     seats[j] -= 1 # updates seats for each class
-                        
+
                     f.write("@\t")
                     if len(meetings[j]) == 0:
                         f.write("TBA")
@@ -1011,7 +1884,7 @@ with ExcelWriter('result.xlsx', engine='xlsxwriter') as writer:
                         for k in meetings[j]:
                             f.write(" ".join(k) + "; ")
                     f.write('\n\n')
-                    
+
                     if record:
                         studentID.append(i)
                         start.append(START)
@@ -1029,106 +1902,179 @@ with ExcelWriter('result.xlsx', engine='xlsxwriter') as writer:
                         meetingInfo_out.append(meetingInfo[j])
                         choice.append(priority)
 
-            if total_lunches < 5:
-                no_lunch[i] = total_lunches
-
-            if not first_choice:
-                no_first_choice.append(i)
+                if total_lunches < 5:
+                    no_lunch[i] = total_lunches
 
-            if not first_choice and not second_choice:
-                no_top2.append(i)
+                if not first_choice:
+                    no_first_choice.append(i)
 
-            if count_top_choice == 0:
-                no_top_choices.append(i)
-
-            if credits != 4:
-                not_four[i] = credits
-            grand_total += total   
-
-            f.write("-----------------------------------------")
-            f.write("\n\n")
-
-        df1 = DataFrame({"ID": studentID, "Start": start, "Year": year, "Student Name": studentName, "email": studentEmail, 
-                    "Stu Type": stuType_out, "Major Interests": major, "Graduate Education": graduateEd, "Placements": placements_out,
-                    "Section Name": sectionName, "Title": courseTitle, "Course Type": courseType_out,  "Meeting Info": meetingInfo_out, "Priority": choice})  
-        
-
-    df1.to_excel(writer, sheet_name = "Student Info", index = False)
-    workbook = writer.book
-    worksheet = writer.sheets['Student Info']
-    
-    # Adjusts the width of columns in excel
-    for i, col in enumerate(df1.columns):
-        max_length = max(df1[col].astype(str).map(len).max(), len(col))
-        worksheet.set_column(i, i, max_length + 2) 
-
-
-    # Record statistics of the run in results.txt
-    with open("results.txt", "w") as f:
-        f.write("Average ranking: {}\n\n".format(grand_total / len(id)))
-        f.write("------------------------------------------------------------------------------\n\n")
-        f.write("Students that did not complete preferences (total = {}):\n\n".format(len(no_priorities)))
-        for i in no_priorities:
-            f.write("{} {}\n\n".format(i[0], i[1]))
-        f.write("------------------------------------------------------------------------------\n\n\n\n")
-        f.write("Students that did not get all four credits (total = {}):\n\n".format(len(not_four)))
-        for i in not_four:
-            f.write("{} {} with only {} credits\n\n".format(name[i], i, not_four[i]))
-        f.write("------------------------------------------------------------------------------\n\n\n\n")
-
-        f.write("Students that did not get any of the 4 top choices (total = {}):\n\n".format(len(no_top_choices)))
-        for i in no_top_choices:
-            f.write("{} {}\n".format(name[i], i))
-        f.write("------------------------------------------------------------------------------\n\n\n\n")
-
-        f.write("Students that did not get first choice (total = {}):\n\n".format(len(no_first_choice)))
-        for i in no_first_choice:
-            f.write("{} {}\n".format(name[i], i))
-        f.write("------------------------------------------------------------------------------\n\n\n\n")
-
-        f.write("Students that did not get first or second choice (total = {}):\n\n".format(len(no_top2)))
-        for i in no_top2:
-            f.write("{} {}\n".format(name[i], i))
-        f.write("------------------------------------------------------------------------------\n\n\n\n")
-
-        f.write("Students that did not get all 5 lunches (total = {}):\n\n".format(len(no_lunch)))
-        for i in no_lunch:
-            f.write("{} {}\n".format(name[i], i))
-        f.write("------------------------------------------------------------------------------\n\n\n\n")
-
-        empty_seats = 0
-
-        sectionName = []
-        courseTitle = []
-        courseSeats = []
-        meetingInfo_out = []
-        crossListed_out = []
-        for j in seats:
-            if seats[j] > 0 and not "LUNCH" in j:
-                f.write("{} has {} empty seats\n".format(j, seats[j]))
-                empty_seats += seats[j]
-
-            if not "LUNCH" in j:
-                sectionName.append(courseDept[j] + "-" + courseNum[j] + "-" + courseSection[j])
-                courseTitle.append(j)
-                courseSeats.append(seats[j])
-                meetingInfo_out.append(meetingInfo[j])
-                crossListed_out.append("Y" if j in crossListed else "N")
-
-
-        f.write("\nTotal of {} empty seats.\n\n".format(empty_seats))
-
-        f.write("------------------------------------------------------------------------------\n\n\n\n")
-        df2 = DataFrame({"Section Name": sectionName, "Short Title": courseTitle, "Seats Available": courseSeats, "Meeting Info": meetingInfo_out, "Crosslisted?": crossListed_out})
-    df2.to_excel(writer, sheet_name = "Courses Info", index = False)
-    workbook = writer.book
-    worksheet = writer.sheets['Courses Info']
-    
-    # Adjusts the width of columns in excel
-    for i, col in enumerate(df2.columns):
-        max_length = max(df2[col].astype(str).map(len).max(), len(col))
-        worksheet.set_column(i, i, max_length + 2) 
-
-print()
-print(bcolors.OKGREEN + "[!] Check 'results.txt' for statistics of the latest run." + bcolors.ENDC)
-print(bcolors.OKGREEN + "[!] Check 'result.xlsx' for schedules of each student." + bcolors.ENDC)
+                if not first_choice and not second_choice:
+                    no_top2.append(i)
+
+                if count_top_choice == 0:
+                    no_top_choices.append(i)
+
+                if credits != 4:
+                    not_four[i] = credits
+                grand_total += total   
+
+                f.write("-----------------------------------------")
+                f.write("\n\n")
+
+            df1 = DataFrame({"ID": studentID, "Start": start, "Year": year, "Student Name": studentName, "email": studentEmail, 
+                        "Stu Type": stuType_out, "Major Interests": major, "Graduate Education": graduateEd, "Placements": placements_out,
+                        "Section Name": sectionName, "Title": courseTitle, "Course Type": courseType_out,  "Meeting Info": meetingInfo_out, "Priority": choice})  
+
+
+        df1.to_excel(writer, sheet_name = "Student Info", index = False)
+        worksheet = writer.sheets['Student Info']
+
+        # Adjusts the width of columns in excel
+        for i, col in enumerate(df1.columns):
+            max_length = max(df1[col].astype(str).map(len).max(), len(col))
+            worksheet.set_column(i, i, max_length + 2) 
+
+
+        # Record statistics of the run in results.txt
+        with open("results.txt", "w") as f:
+            f.write("Average ranking: {}\n\n".format(grand_total / len(id)))
+            f.write("------------------------------------------------------------------------------\n\n")
+            f.write("Students that did not complete preferences (total = {}):\n\n".format(len(no_priorities)))
+            for i in no_priorities:
+                f.write("{} {}\n\n".format(i[0], i[1]))
+            f.write("------------------------------------------------------------------------------\n\n\n\n")
+            f.write("Students that did not get all four credits (total = {}):\n\n".format(len(not_four)))
+            for i in not_four:
+                f.write("{} {} with only {} credits\n\n".format(name[i], i, not_four[i]))
+            f.write("------------------------------------------------------------------------------\n\n\n\n")
+
+            f.write("Students that did not get any of the 4 top choices (total = {}):\n\n".format(len(no_top_choices)))
+            for i in no_top_choices:
+                f.write("{} {}\n".format(name[i], i))
+            f.write("------------------------------------------------------------------------------\n\n\n\n")
+
+            f.write("Students that did not get first choice (total = {}):\n\n".format(len(no_first_choice)))
+            for i in no_first_choice:
+                f.write("{} {}\n".format(name[i], i))
+            f.write("------------------------------------------------------------------------------\n\n\n\n")
+
+            f.write("Students that did not get first or second choice (total = {}):\n\n".format(len(no_top2)))
+            for i in no_top2:
+                f.write("{} {}\n".format(name[i], i))
+            f.write("------------------------------------------------------------------------------\n\n\n\n")
+
+            f.write("Students that did not get all 5 lunches (total = {}):\n\n".format(len(no_lunch)))
+            for i in no_lunch:
+                f.write("{} {}\n".format(name[i], i))
+            f.write("------------------------------------------------------------------------------\n\n\n\n")
+
+            empty_seats = 0
+
+            sectionName = []
+            courseTitle = []
+            courseSeats = []
+            meetingInfo_out = []
+            crossListed_out = []
+            for j in seats:
+                if seats[j] > 0 and not "LUNCH" in j:
+                    f.write("{} has {} empty seats\n".format(j, seats[j]))
+                    empty_seats += seats[j]
+
+                if not "LUNCH" in j:
+                    sectionName.append(courseDept[j] + "-" + courseNum[j] + "-" + courseSection[j])
+                    courseTitle.append(j)
+                    courseSeats.append(seats[j])
+                    meetingInfo_out.append(meetingInfo[j])
+                    crossListed_out.append("Y" if j in crossListed else "N")
+
+
+            f.write("\nTotal of {} empty seats.\n\n".format(empty_seats))
+
+            f.write("------------------------------------------------------------------------------\n\n\n\n")
+            df2 = DataFrame({"Section Name": sectionName, "Short Title": courseTitle, "Seats Available": courseSeats, "Meeting Info": meetingInfo_out, "Crosslisted?": crossListed_out})
+        df2.to_excel(writer, sheet_name = "Courses Info", index = False)
+        worksheet = writer.sheets['Courses Info']
+
+        # Adjusts the width of columns in excel
+        for i, col in enumerate(df2.columns):
+            max_length = max(df2[col].astype(str).map(len).max(), len(col))
+            worksheet.set_column(i, i, max_length + 2) 
+
+    print()
+    print(bcolors.OKGREEN + "[!] Check 'results.txt' for statistics of the latest run." + bcolors.ENDC)
+    print(bcolors.OKGREEN + "[!] Check 'result.xlsx' for schedules of each student." + bcolors.ENDC)
+
+
+# Writes the schedules of a checkpoint (CHECKPOINT_FILE of a running or stopped solve) like export, without
+# building or solving the model
+def export_checkpoint(catalog: SimpleNamespace, students: SimpleNamespace, path: str = CHECKPOINT_FILE, report: RunReport = None):
+    with open(path) as f:
+        saved = json.load(f)
+    # a solution file (SOLUTION_FILE), or a checkpoint saved before the solver had a bound, has no bound
+    bound = saved.get("bound")
+    stayBonus = saved.get("stay bonus", 0)
+    value = saved["objective"] + stayBonus # objective of the model, which the bound is on
+    if bound is None:
+        print(f"{bcolors.OKCYAN}Exporting the checkpoint {path}: objective {saved['objective']:.2f}, no bound.{bcolors.ENDC}")
+    else:
+        gap = (bound - value) / max(abs(value), 1e-10)
+        print(f"{bcolors.OKCYAN}Exporting the checkpoint {path}: objective {saved['objective']:.2f}"
+              + (f" (+ {stayBonus:.2f} stay bonus)" if stayBonus > 0 else "") + f", bound {bound:.2f} "
+              f"(gap {gap * 100:.2f}%).{bcolors.ENDC}")
+    labSections = [j for l in catalog.labs for j in (catalog.multiSection[l] if l in catalog.multiSection else [l])]
+    export(catalog, students, SimpleNamespace(lab_constraint = labSections),
+           SimpleNamespace(assigned = {i: set(titles) for i, titles in saved["schedules"].items()}, value = value, stayBonus = stayBonus), report)
+
+
+# Runs the stages of the pipeline up to and including until
+#   stages     - stage -> result of the stages that already ran (reused, ex. {"catalog": catalog}); the results of
+#                the stages run here are added to it, also when a later stage fails
+#   checkpoint - export the schedules of this checkpoint file instead of building and solving the model
+# Returns stages
+def run(until: str = "export", classes: str = "classes.csv", priorities: str = "priorities.csv",
+        stages: dict = None, report: RunReport = None, checkpoint: str = None) -> dict:
+    stages = {} if stages is None else stages
+    report = report or RunReport()
+    last = STAGES.index(until)
+    if last >= 0 and not "catalog" in stages:
+        stages["catalog"] = load_catalog(classes, report)
+    if last >= 1 and not "students" in stages:
+        stages["students"] = load_students(stages["catalog"], priorities, report)
+    if checkpoint is not None:
+        if last >= 4:
+            export_checkpoint(stages["catalog"], stages["students"], checkpoint, report)
+            report.values["checkpoint"] = checkpoint
+    else:
+        if last >= 2 and not "build" in stages:
+            stages["build"] = build_model(stages["catalog"], stages["students"], report)
+        if last >= 3 and not "solve" in stages:
+            stages["solve"] = solve(stages["catalog"], stages["students"], stages["build"], report)
+        if last >= 4:
+            export(stages["catalog"], stages["students"], stages["build"], stages["solve"], report)
+
+    report.phase()
+    report.values.update({"model engine": MODEL_ENGINE, "overlap formulation": OVERLAP_FORMULATION, "heuristic": HEURISTIC,
+                          "last stage": until, "classes": len(stages["catalog"].classTitles)})
+    if "students" in stages:
+        report.values["students"] = len(stages["students"].id)
+    if "build" in stages:
+        report.values.update({"model students": len(stages["build"].modelStudents), "student-class pairs": len(stages["build"].pairs)})
+    report.write(REPORT_FILE)
+    print(bcolors.OKGREEN + "[!] Check '" + REPORT_FILE + "' for times, model size and solver statistics of the latest run." + bcolors.ENDC)
+    return stages
+
+
+# Command line: python main.py [stage] [--classes classes.csv] [--priorities priorities.csv] [--checkpoint [file]]
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description = "Places students into classes (stages: " + " -> ".join(STAGES) + ").")
+    parser.add_argument("stage", nargs = "?", default = "export", choices = STAGES, help = "last stage to run (default: export)")
+    parser.add_argument("--classes", default = "classes.csv", help = "classes file (default: classes.csv)")
+    parser.add_argument("--priorities", default = "priorities.csv", help = "students' preferences file (default: priorities.csv)")
+    parser.add_argument("--checkpoint", nargs = "?", const = CHECKPOINT_FILE, default = None,
+                        help = "export the schedules of a checkpoint file (default: " + CHECKPOINT_FILE + ") instead of solving")
+    args = parser.parse_args(argv)
+    run(args.stage, args.classes, args.priorities, checkpoint = args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
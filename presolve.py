@@ -0,0 +1,123 @@
+from collections import defaultdict
+from schedules import best_schedule
+
+
+'''
+Presolve of the student model, run on the constraint rows before the solver model is built
+    uncontested title - every student who can still take it fits in its seats, so its enrollment cap can never bind
+    dominated column  - a class of a student that conflicts with a strictly better uncontested class of the student
+                        meeting only within its times and weighing no more in any of the student's rows: swapping
+                        them always pays off, so no optimal schedule takes the dominated class
+    decided student   - the best schedule of the student (own rows only, seats ignored) takes only uncontested
+                        titles, so the student gets it whatever the others do
+    Deciding students frees demand, which makes more titles uncontested, so the checks repeat until nothing changes.
+
+    pairs       - (id, title) of each column
+    constraints - family -> [sense, rows], row = [columns, coefficients (None if all ones), rhs]; the "cap" rows
+                  are the enrollment caps, every other row belongs to one student
+    objective   - objective coefficient of each column
+    counts      - id -> number of students the id stands for (students of its type)
+    seats       - title -> seats (titles without a seat limit, like the lunches, are left out: always uncontested)
+    masks       - title -> weekly meeting bitmask (see conflicts.ConflictGraph) of the titles that may dominate or
+                  be dominated (not the lunch columns, which stand for several windows)
+    lunchGroups - id -> list of lunch columns per day (see schedules.ScheduleSearch)
+'''
+
+# rows about meeting times, which the masks already cover
+TIME_FAMILIES = ["overlap"]
+
+
+# Presolve
+# Returns (id -> columns of the schedule of the decided students, set of dominated columns)
+def presolve(pairs: list, constraints: dict, objective: list, counts: dict, seats: dict, masks: dict, lunchGroups: dict) -> tuple:
+    studentColumns = defaultdict(list) # id -> columns
+    for k, (i, j) in enumerate(pairs):
+        studentColumns[i].append(k)
+    studentRows = defaultdict(list) # id -> own rows [sense, columns, coefficients, rhs]
+    rowsOf = defaultdict(dict) # column -> {id of the row: (sense, coefficient)} of the own rows except TIME_FAMILIES
+    for family in constraints:
+        if family == "cap":
+            continue
+        sense, rows = constraints[family]
+        for columns, coefficients, rhs in rows:
+            row = [sense, columns, coefficients, rhs]
+            studentRows[pairs[columns[0]][0]].append(row)
+            if not family in TIME_FAMILIES:
+                for index, k in enumerate(columns):
+                    rowsOf[k][id(row)] = (sense, 1 if coefficients is None else coefficients[index])
+
+    # True if column u can replace column v in any schedule of the student
+    def replaces(u: int, v: int) -> bool:
+        for row, (sense, coefficient) in rowsOf[u].items():
+            other = rowsOf[v].get(row, (sense, 0))[1]
+            if coefficient > other if sense == "<" else coefficient != other:
+                return False
+        return all(rowsOf[u].get(row, (sense, 0))[1] == coefficient for row, (sense, coefficient) in rowsOf[v].items() if sense == "=")
+
+    demand = defaultdict(int) # title -> students who can take it
+    for k, (i, j) in enumerate(pairs):
+        demand[j] += counts[i]
+    left = dict(seats)
+    decided = {}
+    dominated = set()
+    best = {} # id -> best schedule (recomputed when columns of the student are dominated)
+    changed = True
+    while changed:
+        changed = False
+        uncontested = set(j for j in demand if not j in left or demand[j] <= left[j])
+
+        for i in studentColumns:
+            if i in decided:
+                continue
+            better = [u for u in studentColumns[i] if not u in dominated and pairs[u][1] in uncontested and masks.get(pairs[u][1], 0) != 0]
+            for v in studentColumns[i]:
+                if v in dominated or not pairs[v][1] in masks:
+                    continue
+                mask = masks[pairs[v][1]]
+                if any(objective[u] > objective[v] and masks[pairs[u][1]] & mask == masks[pairs[u][1]] and replaces(u, v) for u in better):
+                    dominated.add(v)
+                    demand[pairs[v][1]] -= counts[i]
+                    best.pop(i, None)
+                    changed = True
+
+            columns = [k for k in studentColumns[i] if not k in dominated]
+            if not i in best:
+                groups = [[k for k in group if not k in dominated] for group in lunchGroups[i]]
+                best[i] = best_schedule(columns, groups, studentRows[i], objective)[1]
+            if all(pairs[k][1] in uncontested for k in best[i]):
+                decided[i] = list(best[i])
+                for k in columns:
+                    demand[pairs[k][1]] -= counts[i]
+                for k in best[i]:
+                    if pairs[k][1] in left:
+                        left[pairs[k][1]] -= counts[i]
+                changed = True
+    return decided, dominated
+
+
+# Removes fixed columns from the rows: every row loses the columns, its right hand side what they add up to
+# (fixed - column -> 0 or 1). Rows left without columns, and "<" rows that can no longer be violated, are dropped.
+# Returns (kept pairs, constraints, objective) over the kept columns
+def fix_columns(pairs: list, constraints: dict, objective: list, fixed: dict) -> tuple:
+    newColumn = {}
+    for k in range(len(pairs)):
+        if not k in fixed:
+            newColumn[k] = len(newColumn)
+    kept = {}
+    for family in constraints:
+        sense, rows = constraints[family]
+        keptRows = []
+        for columns, coefficients, rhs in rows:
+            coefficients = [1] * len(columns) if coefficients is None else coefficients
+            rhs -= sum(coefficient * fixed[k] for k, coefficient in zip(columns, coefficients) if k in fixed)
+            remaining = [(newColumn[k], coefficient) for k, coefficient in zip(columns, coefficients) if not k in fixed]
+            if len(remaining) == 0:
+                continue
+            if sense == "<" and sum(coefficient for k, coefficient in remaining if coefficient > 0) <= rhs + 1e-9:
+                continue
+            newCoefficients = [coefficient for k, coefficient in remaining]
+            keptRows.append([[k for k, coefficient in remaining], None if all(c == 1 for c in newCoefficients) else newCoefficients, rhs])
+        if len(keptRows) > 0:
+            kept[family] = [sense, keptRows]
+    keptPairs = [pairs[k] for k in newColumn]
+    return keptPairs, kept, [objective[k] for k in newColumn]
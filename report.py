@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+from gurobipy import GRB
+
+
+# Peak resident memory of the process so far in MB (None where the resource module is not available)
+def peak_memory() -> float:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+'''
+Run report: phases, model size and solve statistics of one run, written as json
+    phases   - [name, wall time, cpu time, peak memory (MB) at the end of the phase]
+               report.phase(name) ends the running phase and starts the next one, so the phases of the
+               script follow each other without indenting it
+    families - constraint family -> {"rows", "nonzeros"}
+    solve    - Gurobi statistics of the solve (status, runtime, nodes, gap, presolve reductions, ...)
+    values   - anything else worth keeping (settings, counts)
+'''
+class RunReport:
+
+    def __init__(self):
+        self.phases = []
+        self.families = {}
+        self.solve = {}
+        self.values = {}
+        self.presolve = {}
+        self.running = None
+        self.start = time.time()
+
+    # Ends the running phase and starts the named one (None only ends it)
+    def phase(self, name: str = None):
+        now = (time.time(), time.process_time())
+        if self.running is not None:
+            runningName, wall, cpu = self.running
+            self.phases.append([runningName, now[0] - wall, now[1] - cpu, peak_memory()])
+        self.running = None if name is None else (name, now[0], now[1])
+
+    # Wall time of the named phase (0 if it did not run)
+    def time(self, name: str) -> float:
+        return sum(phase[1] for phase in self.phases if phase[0] == name)
+
+    def family(self, name: str, rows: int, nonzeros: int):
+        self.families[name] = {"rows": rows, "nonzeros": nonzeros}
+
+    # Gurobi callback recording the presolve reductions (pass to m.optimize, or call from another callback)
+    def callback(self, model, where):
+        if where == GRB.Callback.PRESOLVE:
+            self.presolve = {"removed columns": model.cbGet(GRB.Callback.PRE_COLDEL),
+                             "removed rows": model.cbGet(GRB.Callback.PRE_ROWDEL),
+                             "changed senses": model.cbGet(GRB.Callback.PRE_SENCHG),
+                             "changed bounds": model.cbGet(GRB.Callback.PRE_BNDCHG),
+                             "changed coefficients": model.cbGet(GRB.Callback.PRE_COECHG)}
+
+    # Records the statistics of the solved model
+    def record_solve(self, m):
+        self.solve = {"status": m.Status, "runtime": m.Runtime, "variables": m.NumVars, "integer variables": m.NumIntVars,
+                      "rows": m.NumConstrs, "nonzeros": m.NumNZs, "solutions": m.SolCount,
+                      "simplex iterations": m.IterCount, "presolve": self.presolve}
+        if m.IsMIP:
+            self.solve["nodes"] = m.NodeCount
+        if m.SolCount > 0:
+            self.solve["objective"] = m.ObjVal
+            if m.IsMIP:
+                self.solve["bound"] = m.ObjBound
+                self.solve["gap"] = m.MIPGap
+
+    def as_dict(self) -> dict:
+        return {"total time": time.time() - self.start, "peak memory (MB)": peak_memory(),
+                "phases": [{"phase": name, "wall time": wall, "cpu time": cpu, "peak memory (MB)": memory}
+                           for name, wall, cpu, memory in self.phases],
+                "families": self.families, "solve": self.solve, "values": self.values}
+
+    # Writes the report as json (atomically, so a reader never sees half a report)
+    def write(self, path: str):
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.as_dict(), f, indent = 1)
+        os.replace(path + ".tmp", path)
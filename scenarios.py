@@ -0,0 +1,251 @@
+import copy
+import csv
+import json
+import multiprocessing
+import os
+import re
+import sys
+import main
+from types import SimpleNamespace
+from gurobipy import tupledict, tuplelist
+from arrays import ClassArrays
+from report import RunReport
+
+# What-if scenarios: runs the pipeline for a list of changes to the classes and settings in a process pool
+# and compares the statistics of results.txt of every scenario with the base run
+# Usage: python scenarios.py [scenarios.json] [classes.csv] [priorities.csv]
+#
+# The catalog and the students are read once and passed to every worker process. The base run (no changes)
+# runs first and its schedules are the warm start (WARM_START) of every scenario. Each scenario runs in its
+# own directory SCENARIO_DIR/<number>-<name> (output files of the run, run.log), the comparison table is
+# printed and written to SCENARIO_DIR/comparison.csv.
+
+'''
+Scenarios file: list of scenarios, each a dict with a "name" and any of
+    "seats"    - title -> seats added (negative to cut seats)
+    "add"      - sections to add, each {"course": course name, "section": section, "seats": seats and optionally
+                 "meetings": ["MWF 11:00AM 11:50AM", ...]}; the section is a copy of the first section of the
+                 course (the same meetings unless given)
+    "remove"   - titles of the sections to remove (ex. "CALCULUS I-2")
+    "settings" - constants of main.py -> value (ex. {"LUNCH_PRIORITY": 2, "DIVISION_LIMIT": 4}); dicts
+                 (LOOKUP, DIVISIONS) are merged into the constant, ex. {"LOOKUP": {"12": 30}}
+
+    ex. [{"name": "extra calculus", "add": [{"course": "MATH 113", "section": "9", "seats": 20}]},
+         {"name": "less lunch", "settings": {"LUNCH_PRIORITY": 2}}]
+
+Scenarios that add or remove sections read the changed classes (and the students) again; settings used when
+reading the students (LUNCH_PRIORITY, LUNCH2PM_PRIORITY, PLACEMENTS, ...) read the students again.
+'''
+
+SCENARIO_DIR = "scenarios"
+PROCESSES = None # worker processes (None = all cores)
+
+# settings used by load_students
+STUDENT_SETTINGS = ["LUNCH_PRIORITY", "LUNCH2PM_PRIORITY", "PLACEMENTS", "REQUIRED_PLACEMENT", "SPECIAL_PLACEMENT_CASES", "START", "YEAR"]
+
+# statistics of results.txt: pattern -> name (None = named by the first group)
+STATISTICS = [(r"Average ranking: ([-\d.]+)", "average ranking"),
+              (r"Students that (.*) \(total = (\d+)\)", None),
+              (r"Total of (\d+) empty seats", "empty seats")]
+
+
+# Statistics of a results.txt (name -> value)
+def read_results(path: str) -> dict:
+    statistics = {}
+    with open(path) as f:
+        for line in f:
+            for pattern, name in STATISTICS:
+                match = re.match(pattern, line)
+                if match is not None:
+                    if name is None:
+                        statistics[match.group(1)] = float(match.group(2))
+                    else:
+                        statistics[name] = float(match.group(1))
+    return statistics
+
+
+# Writes classes.csv with the sections of the scenario added and removed (titles of the catalog)
+def change_classes(source: str, path: str, catalog, add: list, remove: list):
+    with open(source, encoding = 'utf-8-sig') as f:
+        rows = [row for row in csv.reader(f)]
+    header = rows[0]
+    index = {column: header.index(column) for column in ["Dept", "Course Number", "Section", "Short Title", "Sched Capacity",
+                                                         "XList Capacity", "Total Enr", "Start/End Date Bldg Room Meth Days Start/End time"]}
+    meetingColumn = index["Start/End Date Bldg Room Meth Days Start/End time"]
+
+    removed = set((catalog.courseDept[j], catalog.courseNum[j], catalog.courseSection[j]) for j in remove)
+    kept = [header] + [row for row in rows[1:] if not (row[index["Dept"]], row[index["Course Number"]], row[index["Section"]]) in removed]
+
+    for section in add:
+        dept, number = section["course"].split()
+        first = [row for row in rows[1:] if row[index["Dept"]] == dept and row[index["Course Number"]] == number]
+        if len(first) == 0:
+            raise ValueError("course {} not found in {}".format(section["course"], source))
+        row = list(first[0])
+        row[index["Section"]] = str(section["section"])
+        row[index["Sched Capacity"]] = str(section["seats"])
+        row[index["XList Capacity"]] = ""
+        row[index["Total Enr"]] = "0"
+        if "meetings" in section:
+            line = row[meetingColumn].split("\n")[0]
+            kind = [k for k in ["LEC", "LAB", "STU"] if k in line]
+            prefix = line[:line.find(kind[0]) + 5] if len(kind) > 0 else "TBA TBA TBA TBA LEC  "
+            row[meetingColumn] = "\n".join(prefix + meeting for meeting in section["meetings"])
+        kept.append(row)
+
+    with open(path, "w", newline = "", encoding = 'utf-8-sig') as f:
+        csv.writer(f).writerows(kept)
+
+
+# Copy of a stage result that can be passed to the worker processes: the columns made by multidict are
+# plain dicts and lists (gurobipy tupledicts and tuplelists are not restored by pickle)
+def picklable(stage: SimpleNamespace) -> SimpleNamespace:
+    converted = {}
+    for name, value in vars(stage).items():
+        if isinstance(value, tupledict):
+            value = dict(value)
+        elif isinstance(value, tuplelist):
+            value = list(value)
+        converted[name] = value
+    return SimpleNamespace(**converted)
+
+
+# catalog, students and base solution of the worker process (set by the pool initializer)
+_shared = {}
+
+
+def _init(catalog, students, warmStart: str, classes: str, priorities: str):
+    _shared.update(catalog = catalog, students = students, warmStart = warmStart, classes = classes, priorities = priorities)
+
+
+# Runs one scenario (in a worker process) in its directory
+# Returns (number, objective, statistics of results.txt, solve time, error message or None)
+def _run(task: tuple) -> tuple:
+    number, scenario, directory = task
+    settings = dict(scenario.get("settings", {}))
+    for name, value in list(settings.items()):
+        if isinstance(value, dict):
+            merged = dict(getattr(main, name))
+            merged.update({float(k) if name == "LOOKUP" else k: v for k, v in value.items()})
+            settings[name] = merged
+    settings.update(WARM_START = _shared["warmStart"], PROCESSES = 1, REPORT_FILE = "report.json")
+    saved = {name: getattr(main, name) for name in list(settings) + ["LOOKUP"]}
+    cwd = os.getcwd()
+    os.makedirs(directory, exist_ok = True)
+    os.chdir(directory)
+    log = open("run.log", "w")
+    sys.stdout.flush()
+    stdout = os.dup(1)
+    os.dup2(log.fileno(), 1) # also the output of Gurobi
+    sys.stdout = log
+    try:
+        for name in settings:
+            setattr(main, name, settings[name])
+        # lunches weigh LOOKUP[LUNCH_PRIORITY] (as main.LOOKUP, a lunch priority that is also a ranking keeps its weight)
+        main.LOOKUP = dict(main.LOOKUP)
+        main.LOOKUP.setdefault(main.LUNCH_PRIORITY, main.LUNCH_PRIORITY)
+        main.LOOKUP.setdefault(main.LUNCH2PM_PRIORITY, main.LUNCH2PM_PRIORITY)
+
+        stages = {}
+        report = RunReport()
+        if len(scenario.get("add", [])) > 0 or len(scenario.get("remove", [])) > 0:
+            change_classes(_shared["classes"], "classes.csv", _shared["catalog"], scenario.get("add", []), scenario.get("remove", []))
+            catalog = main.load_catalog("classes.csv", report)
+        else:
+            catalog = copy.deepcopy(_shared["catalog"])
+            if "DIVISIONS" in settings:
+                catalog.classArrays = ClassArrays(catalog.classTitles, catalog.classDict, main.DIVISIONS)
+            if not any(name in settings for name in STUDENT_SETTINGS):
+                stages["students"] = copy.deepcopy(_shared["students"])
+        for j, added in scenario.get("seats", {}).items():
+            catalog.seats[j] = max(catalog.seats[j] + added, 0)
+            catalog.classDict[j][4] = catalog.seats[j]
+            catalog.classArrays.seats[catalog.classArrays.index[j]] = catalog.seats[j]
+        stages["catalog"] = catalog
+        main.run("export", _shared["classes"], _shared["priorities"], stages = stages, report = report)
+        return (number, stages["solve"].value, read_results("results.txt"), report.time("solve"), None)
+    except (Exception, SystemExit) as error:
+        return (number, None, {}, None, "{}: {}".format(type(error).__name__, error))
+    finally:
+        for name in saved:
+            setattr(main, name, saved[name])
+        sys.stdout.flush()
+        sys.stdout = sys.__stdout__
+        os.dup2(stdout, 1)
+        os.close(stdout)
+        log.close()
+        os.chdir(cwd)
+
+
+# Directory name of a scenario
+def scenario_directory(number: int, name: str) -> str:
+    return os.path.join(SCENARIO_DIR, "{}-{}".format(number, re.sub(r"[^\w.-]+", "_", name)))
+
+
+# Runs the base run and the scenarios
+# Returns list of (name, objective, statistics, solve time, error) per run, the base run first
+def run_scenarios(scenarios: list, classes: str, priorities: str, processes: int = None) -> list:
+    scenarios = [{"name": "base"}] + scenarios
+    directories = [os.path.abspath(scenario_directory(number, scenario["name"])) for number, scenario in enumerate(scenarios)]
+
+    # catalog, students and base run in this process
+    cwd = os.getcwd()
+    os.makedirs(directories[0], exist_ok = True)
+    os.chdir(directories[0])
+    try:
+        catalog = picklable(main.load_catalog(classes))
+        students = picklable(main.load_students(catalog, priorities))
+    finally:
+        os.chdir(cwd)
+    _init(catalog, students, "", classes, priorities)
+    results = [None] * len(scenarios)
+    results[0] = _run((0, scenarios[0], directories[0]))
+    warmStart = os.path.join(directories[0], main.SOLUTION_FILE) if results[0][4] is None else ""
+    print("Base run: {}".format(results[0][4] or "objective {:.2f}".format(results[0][1])))
+
+    tasks = [(number, scenarios[number], directories[number]) for number in range(1, len(scenarios))]
+    processes = min(processes or multiprocessing.cpu_count(), max(len(tasks), 1))
+    with multiprocessing.get_context("spawn").Pool(processes, initializer = _init,
+                                                   initargs = (catalog, students, warmStart, classes, priorities)) as pool:
+        for result in pool.imap_unordered(_run, tasks):
+            results[result[0]] = result
+            number = result[0]
+            print("Scenario {} ({}): {}".format(number, scenarios[number]["name"],
+                                                result[4] or "objective {:.2f}".format(result[1])))
+    return [(scenario["name"],) + tuple(result[1:]) for scenario, result in zip(scenarios, results)]
+
+
+# Comparison table (rows of strings): objective and its change against the base run, statistics, solve time
+def comparison(results: list) -> list:
+    names = []
+    for name, objective, statistics, runtime, error in results:
+        names.extend(statistic for statistic in statistics if not statistic in names)
+    base = results[0][1]
+    table = [["scenario", "objective", "change"] + names + ["solve time(s)"]]
+    for name, objective, statistics, runtime, error in results:
+        if error is not None:
+            table.append([name, "failed: " + error] + [""] * (len(names) + 2))
+            continue
+        change = "" if base is None else "{:+.2f}".format(objective - base)
+        table.append([name, "{:.2f}".format(objective), change] + ["{:g}".format(statistics[s]) if s in statistics else "-" for s in names]
+                     + ["{:.2f}".format(runtime)])
+    return table
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "scenarios.json"
+    classes = os.path.abspath(sys.argv[2] if len(sys.argv) > 2 else "classes.csv")
+    priorities = os.path.abspath(sys.argv[3] if len(sys.argv) > 3 else "priorities.csv")
+    with open(path) as f:
+        scenarios = json.load(f)
+
+    table = comparison(run_scenarios(scenarios, classes, priorities, PROCESSES))
+    with open(os.path.join(SCENARIO_DIR, "comparison.csv"), "w", newline = "") as f:
+        csv.writer(f).writerows(table)
+
+    widths = [max(len(row[k]) for row in table) for k in range(len(table[0]))]
+    print()
+    for row in table:
+        print("  ".join(value.ljust(width) if k == 0 else value.rjust(width) for k, (value, width) in enumerate(zip(row, widths))))
+    print()
+    print("Comparison written to " + os.path.join(SCENARIO_DIR, "comparison.csv") + ", output files of every run in " + SCENARIO_DIR + ".")
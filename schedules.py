@@ -0,0 +1,147 @@
+from collections import defaultdict
+
+
+'''
+Depth-first search over the schedules of one student
+    columns     - columns (variables) of the student
+    lunchGroups - list of lunch columns per day; lunches are not branched on, every schedule gets the
+                  best free lunch of each day
+    rows        - the student's own constraint rows [sense, columns, coefficients (None if all ones), rhs]
+                  "<" rows must have non-negative coefficients
+    objective   - objective coefficient of each column (list or dict indexed by column)
+'''
+class ScheduleSearch:
+
+    def __init__(self, columns: list, lunchGroups: list, rows: list, objective):
+        lunchColumns = set(c for group in lunchGroups for c in group)
+        self.courseColumns = [c for c in columns if not c in lunchColumns]
+        self.lunchGroups = [sorted(group, key = lambda c: -objective[c]) for group in lunchGroups]
+        self.rows = rows
+        self.objective = objective
+
+        self.rowsOf = defaultdict(list) # column -> [(row, coefficient)]
+        for r, (sense, rowColumns, coefficients, rhs) in enumerate(rows):
+            for k, c in enumerate(rowColumns):
+                self.rowsOf[c].append((r, 1 if coefficients is None else coefficients[k]))
+        self.equalities = [r for r, row in enumerate(rows) if row[0] == "="]
+
+        self.activity = [0] * len(rows)
+        self.chosen = []
+
+    # True if taking the column keeps every "<" row satisfied
+    def fits(self, c) -> bool:
+        for r, coefficient in self.rowsOf[c]:
+            if self.rows[r][0] == "<" and self.activity[r] + coefficient > self.rows[r][3] + 1e-9:
+                return False
+        return True
+
+    def take(self, c, sign: int):
+        for r, coefficient in self.rowsOf[c]:
+            self.activity[r] += sign * coefficient
+
+    # Schedule of the chosen classes with their lunches as (value, columns),
+    # or None if an equality row (labs) is violated
+    def schedule(self) -> tuple:
+        for r in self.equalities:
+            if abs(self.activity[r] - self.rows[r][3]) > 1e-9:
+                return None
+        lunches = []
+        for group in self.lunchGroups:
+            for c in group:
+                if self.objective[c] > 0 and self.fits(c):
+                    self.take(c, 1)
+                    lunches.append(c)
+                    break
+        for c in lunches:
+            self.take(c, -1)
+        schedule = tuple(self.chosen) + tuple(lunches)
+        return (sum(self.objective[c] for c in schedule), schedule)
+
+
+class ScheduleLimit(Exception):
+    pass
+
+
+# Enumerates the feasible schedules of one student (see ScheduleSearch for the arguments)
+# Returns list of (value, columns of the schedule), including the schedule without classes,
+# or None if there are more than limit schedules
+def enumerate_schedules(columns: list, lunchGroups: list, rows: list, objective, limit: int = None) -> list:
+    search = ScheduleSearch(columns, lunchGroups, rows, objective)
+    schedules = []
+
+    def visit(k: int):
+        if k == len(search.courseColumns):
+            schedule = search.schedule()
+            if schedule is not None:
+                schedules.append(schedule)
+                if limit is not None and len(schedules) > limit:
+                    raise ScheduleLimit()
+            return
+        c = search.courseColumns[k]
+        if search.fits(c):
+            search.take(c, 1)
+            search.chosen.append(c)
+            visit(k + 1)
+            search.chosen.pop()
+            search.take(c, -1)
+        visit(k + 1)
+
+    try:
+        visit(0)
+    except ScheduleLimit:
+        return None
+    return schedules
+
+
+# Finds the most valuable feasible schedule of one student by branch and bound
+# (objective may have negative coefficients, ex. reduced costs in column generation)
+# Returns (value, columns of the schedule)
+def best_schedule(columns: list, lunchGroups: list, rows: list, objective) -> tuple:
+    search = ScheduleSearch(columns, lunchGroups, rows, objective)
+    courseColumns = search.courseColumns
+
+    # most that the remaining classes and the lunches can add
+    remaining = [0] * (len(courseColumns) + 1)
+    for k in range(len(courseColumns) - 1, -1, -1):
+        remaining[k] = remaining[k + 1] + max(0, objective[courseColumns[k]])
+    lunchBound = sum(max([0] + [objective[c] for c in group]) for group in lunchGroups)
+    best = [None]
+
+    def visit(k: int, value: float):
+        if best[0] is not None and value + remaining[k] + lunchBound <= best[0][0] + 1e-9:
+            return
+        if k == len(courseColumns):
+            schedule = search.schedule()
+            if schedule is not None and (best[0] is None or schedule[0] > best[0][0]):
+                best[0] = schedule
+            return
+        c = courseColumns[k]
+        if search.fits(c):
+            search.take(c, 1)
+            search.chosen.append(c)
+            visit(k + 1, value + objective[c])
+            search.chosen.pop()
+            search.take(c, -1)
+        visit(k + 1, value)
+
+    visit(0, 0)
+    return best[0]
+
+
+# Removes schedules that are never needed in an optimal solution: a schedule is dominated if
+# another schedule is worth at least as much and only uses a subset of its limited titles
+# (titles whose seats could run out). Keeps the best schedule for each set of limited titles.
+# Input: list of (value, titles), set of limited titles
+def remove_dominated(schedules: list, limited: set) -> list:
+    best = {} # limited titles used -> (value, titles)
+    for value, titles in schedules:
+        key = frozenset(j for j in titles if j in limited)
+        if not key in best or value > best[key][0]:
+            best[key] = (value, titles)
+
+    kept = []
+    for key in sorted(best, key = len):
+        value = best[key][0]
+        if not any(other < key and best[other][0] >= value for other in kept):
+            kept.append(key)
+    return [best[key] for key in kept]
@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generate_instance
+import main
+
+
+# With more students than the seats of a lunch window (1000) the lunch columns, which stand for every
+# window of their weight, still get no enrollment cap rows
+def test_no_lunch_cap_rows(tmp_path, monkeypatch):
+    generate_instance.generate(1100, 0, str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "HEURISTIC", "only") # the rows are built, the Gurobi model is not
+    monkeypatch.setattr(main, "CATALOG_CACHE", "")
+    stages = main.run("build", "classes.csv", "priorities.csv")
+
+    model = stages["build"]
+    lunchTitles = set(j for day in "MTWRF" for j in stages["catalog"].multiSection["Lunch " + day])
+    assert len(model.modelStudents) + len(model.decidedSchedules) > 1000
+    capped = set(model.pairs[row[0][0]][1] for row in model.constraints.get("cap", ["<", []])[1])
+    assert len(capped & lunchTitles) == 0
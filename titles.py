@@ -0,0 +1,48 @@
+from collections import Counter
+
+
+# Normalizes a course name for lookups (ex. " govt  116w" -> "GOVT 116W")
+def normalize(courseName: str) -> str:
+    return " ".join(courseName.upper().split())
+
+
+'''
+Course name -> title index
+    Built once after classes.csv is parsed. Resolves a course name the same way a scan would:
+    departments that offer one class first, then crosslisted course names, then the course
+    names of all classes (first section of a multisection course).
+
+    misses -> Counter of course names that were looked up but not found
+'''
+class TitleIndex:
+
+    def __init__(self, classDict: dict, crossListed: dict, one_class_dept: dict):
+        self.index = {}
+        self.misses = Counter()
+
+        # lowest precedence first, so that higher precedence names overwrite them
+        # (lunch pseudo-classes are left out: a ranking named "lunch" is not a class)
+        for title, info in reversed(list(classDict.items())):
+            if info[0] != "lunch":
+                self.index[normalize(info[2])] = title
+
+        for title in reversed(list(crossListed.keys())):
+            for courseName in crossListed[title]:
+                self.index[normalize(courseName)] = title
+
+        for dept, title in one_class_dept.items():
+            self.index[normalize(dept)] = title
+
+    # Returns tuple (True, title) if found, or (False, courseName) if not found
+    def find(self, courseName: str) -> tuple:
+        title = self.index.get(normalize(courseName))
+        if title is None:
+            self.misses[courseName] += 1
+            return (False, courseName)
+        return (True, title)
+
+    def __contains__(self, courseName: str) -> bool:
+        return normalize(courseName) in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
@@ -0,0 +1,152 @@
+from collections import defaultdict
+from itertools import combinations
+from gurobipy import Model, GRB, quicksum
+from schedules import best_schedule
+
+
+'''
+Two-stage solve of multisection courses: stage 1 picks the courses of every student, stage 2 (the section
+model of main.py restricted to these courses) picks the sections
+    pairs       - (id, title) of each column of the section model
+    constraints - family -> [sense, rows], row = [columns, coefficients (None if all ones), rhs]
+    objective   - objective coefficient of each column
+    courseOf    - title -> course (multisection course name, or the title itself); titles left out
+                  (ex. lunches) are not part of stage 1
+    seats       - title -> seats of the section
+    studentRows - id -> the student's own rows [sense, columns, coefficients, rhs]
+
+In stage 1 the sections of a course are merged into one course column: a row keeps the smallest
+coefficient of the sections ("<" rows) or their common coefficient ("=" rows, left out if the sections
+differ), the course is worth its best section and the seats of its sections are added up. The rows about
+single sections (SECTION_FAMILIES) are left out; instead a student only gets courses that have at least
+one combination of sections fitting all of the student's rows (pairs of courses are checked up front,
+whole course sets after each solve, cutting off the ones that do not fit). Stage 1 is a relaxation of the
+section model, so its objective bounds the one-stage optimum.
+'''
+
+SECTION_FAMILIES = ["overlap", "lunch", "cap"]
+
+
+# True if the student can take one section of each course (list of the section columns of each course)
+def _fits(courseColumns: list, rows: list) -> bool:
+    columns = [c for sections in courseColumns for c in sections]
+    value, schedule = best_schedule(columns, [], rows, {c: 1 for c in columns})
+    return value >= len(courseColumns)
+
+
+# Stage 1: courses of every student
+# Returns (id -> set of courses, objective of stage 1, courses sets cut off)
+def solve_courses(pairs: list, constraints: dict, objective: list, courseOf: dict, seats: dict, studentRows: dict,
+                  log = print) -> tuple:
+    courseColumns = defaultdict(list) # (id, course) -> columns of its sections
+    for k, (i, j) in enumerate(pairs):
+        if j in courseOf:
+            courseColumns[i, courseOf[j]].append(k)
+    courseKey = {k: key for key in courseColumns for k in courseColumns[key]} # column -> (id, course)
+
+    m = Model("Courses")
+    m.Params.OutputFlag = 0
+    m.Params.IntegralityFocus = 1
+    m.setParam('MIPGap', 0)
+    y = {key: m.addVar(vtype = GRB.BINARY, obj = max(objective[k] for k in columns)) for key, columns in courseColumns.items()}
+    m.ModelSense = GRB.MAXIMIZE
+
+    for family in constraints:
+        if family in SECTION_FAMILIES:
+            continue
+        sense, rows = constraints[family]
+        for columns, coefficients, rhs in rows:
+            if sense == "=" and any(not k in courseKey for k in columns):
+                continue
+            sectionCoefficients = defaultdict(dict) # (id, course) -> column -> coefficient
+            for index, k in enumerate(columns):
+                if k in courseKey:
+                    sectionCoefficients[courseKey[k]][k] = 1 if coefficients is None else coefficients[index]
+            merged = {}
+            for key in sectionCoefficients:
+                values = [sectionCoefficients[key].get(k, 0) for k in courseColumns[key]]
+                merged[key] = min(values) if sense == "<" else values[0]
+                if sense == "=" and max(values) != min(values):
+                    merged = None
+                    break
+            if merged is None:
+                continue
+            lhs = quicksum(coefficient * y[key] for key, coefficient in merged.items())
+            if sense == "=":
+                m.addConstr(lhs == rhs, name = family)
+            elif sum(coefficient for coefficient in merged.values() if coefficient > 0) > rhs:
+                m.addConstr(lhs <= rhs, name = family)
+
+    # enrollment caps of the courses
+    courseSeats = defaultdict(int)
+    for j in courseOf:
+        courseSeats[courseOf[j]] += seats[j]
+    courseStudents = defaultdict(list) # course -> [(id, course)]
+    for key in y:
+        courseStudents[key[1]].append(key)
+    for course in courseStudents:
+        if len(courseStudents[course]) > courseSeats[course]:
+            m.addConstr(quicksum(y[key] for key in courseStudents[course]) <= courseSeats[course], name = "cap")
+
+    # pairs of courses without a combination of sections that fits (meeting times, labs are checked with the whole set)
+    studentCourses = defaultdict(list) # id -> courses
+    for i, course in courseColumns:
+        studentCourses[i].append(course)
+    conflicts = 0
+    for i in studentCourses:
+        rows = [row for row in studentRows[i] if row[0] == "<"]
+        for a, b in combinations(studentCourses[i], 2):
+            if not _fits([courseColumns[i,a], courseColumns[i,b]], rows):
+                m.addConstr(y[i,a] + y[i,b] <= 1, name = "conflicts")
+                conflicts += 1
+
+    cuts = 0
+    while True:
+        m.optimize()
+        courses = {i: set(course for course in studentCourses[i] if y[i,course].x > .5) for i in studentCourses}
+        added = 0
+        for i in courses:
+            if len(courses[i]) > 1 and not _fits([courseColumns[i,course] for course in courses[i]], studentRows[i]):
+                m.addConstr(quicksum(y[i,course] for course in courses[i]) <= len(courses[i]) - 1, name = "cut")
+                added += 1
+        log(f"Courses: {m.ObjVal:.2f} ({conflicts} conflicting course pairs, {added} course sets cut off)")
+        if added == 0:
+            break
+        cuts += added
+    return courses, m.ObjVal, cuts
+
+
+# Stage 2 balancing: moves students from fuller to emptier sections of the same course (by share of the seats
+# taken) while the student values both sections the same and the new section fits the student's other
+# classes and lunches, so the objective does not change. Moves only go to a section that stays emptier than
+# the one left, which always ends.
+#   sections - course -> its sections
+#   value    - (id, title) -> objective coefficient of the model columns (students whose section is not a
+#              model column stay where they are)
+# Returns the number of moves
+def balance_sections(assigned: dict, sections: dict, seats: dict, value: dict, conflictGraph) -> int:
+    moves = 0
+    for course in sections:
+        holders = {j: [i for i in assigned if j in assigned[i]] for j in sections[course] if seats[j] > 0}
+        moved = True
+        while moved:
+            moved = False
+            fill = {j: len(holders[j]) / seats[j] for j in holders}
+            for full in sorted(holders, key = lambda j: -fill[j]):
+                for empty in sorted(holders, key = lambda j: fill[j]):
+                    if (len(holders[empty]) + 1) / seats[empty] >= fill[full]:
+                        break
+                    for i in holders[full]:
+                        if (i, full) in value and value.get((i, empty)) == value.get((i, full)) and conflictGraph.fits(empty, conflictGraph.mask(j for j in assigned[i] if j != full)):
+                            assigned[i].remove(full)
+                            assigned[i].add(empty)
+                            holders[full].remove(i)
+                            holders[empty].append(i)
+                            moves += 1
+                            moved = True
+                            break
+                    if moved:
+                        break
+                if moved:
+                    break
+    return moves